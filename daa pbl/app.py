@@ -132,6 +132,17 @@ def validate_positive_number(value, field_name):
     except (TypeError, ValueError):
         raise ValueError(f"Invalid {field_name}")
 
+def serialize_route_changes(changes):
+    """Make route change reports JSON safe (unreachable costs become null)."""
+    serialized = []
+    for change in changes:
+        change = dict(change)
+        for key in ("old_cost", "new_cost"):
+            if change[key] == float('inf'):
+                change[key] = None
+        serialized.append(change)
+    return serialized
+
 @app.route("/", methods=["GET"])
 def welcome():
     return render_template("welcome.html")
@@ -159,13 +170,18 @@ def block_road():
             return jsonify({"error": "No active simulation"}), 400
             
         if current_system.block_road(from_node, to_node):
-            # Rerun simulation with blocked road and get the actual filename
-            image_filename = current_system.run_simulation(save_img=True)
+            # Only the affected routes were repaired; replan fully only when
+            # a destination was lost or became reachable again
+            if current_system.needs_replan:
+                image_filename = current_system.run_simulation(save_img=True)
+            else:
+                image_filename = current_system.plot_annotated_graph(save=True)
             
             return jsonify({
                 "success": True,
                 "message": f"Road from {from_node} to {to_node} blocked",
-                "image": image_filename
+                "image": image_filename,
+                "changed_assignments": serialize_route_changes(current_system.last_route_changes)
             })
         else:
             return jsonify({"error": "Road not found"}), 404
@@ -188,13 +204,18 @@ def unblock_road():
             return jsonify({"error": "No active simulation"}), 400
             
         if current_system.unblock_road(from_node, to_node):
-            # Rerun simulation with unblocked road and get the actual filename
-            image_filename = current_system.run_simulation(save_img=True)
+            # Only the affected routes were repaired; replan fully only when
+            # a destination was lost or became reachable again
+            if current_system.needs_replan:
+                image_filename = current_system.run_simulation(save_img=True)
+            else:
+                image_filename = current_system.plot_annotated_graph(save=True)
             
             return jsonify({
                 "success": True,
                 "message": f"Road from {from_node} to {to_node} unblocked",
-                "image": image_filename
+                "image": image_filename,
+                "changed_assignments": serialize_route_changes(current_system.last_route_changes)
             })
         else:
             return jsonify({"error": "Road not found"}), 404
@@ -202,6 +223,179 @@ def unblock_road():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/alternative_routes", methods=["POST"])
+def alternative_routes():
+    global current_system
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "A JSON object with 'from' and 'to' is required"}), 400
+        start = data.get('from')
+        end = data.get('to')
+
+        if not start or not end:
+            return jsonify({"error": "Both start and end nodes are required"}), 400
+
+        if not isinstance(start, str) or not isinstance(end, str):
+            return jsonify({"error": f"Origin and destination must be node names: {start}, {end}"}), 400
+
+        if not current_system:
+            return jsonify({"error": "No active simulation"}), 400
+
+        routes = current_system.alternative_routes(
+            start, end,
+            max_alternatives=int(data.get('max_alternatives', 3)),
+            max_detour=float(data.get('max_detour', 1.5)))
+
+        return jsonify({
+            "success": True,
+            "routes": [{"path": path, "cost": cost} for path, cost in routes]
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/nearest_nodes", methods=["POST"])
+def nearest_nodes():
+    global current_system
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "A JSON object with x and y is required"}), 400
+        if data.get('x') is None or data.get('y') is None:
+            return jsonify({"error": "Both x and y coordinates are required"}), 400
+
+        if not current_system:
+            return jsonify({"error": "No active simulation"}), 400
+
+        nearest = current_system.nearest_nodes(float(data['x']), float(data['y']), int(data.get('k', 1)))
+        return jsonify({
+            "success": True,
+            "nodes": [{"name": name, "distance": dist, "type": current_system.node_types[name]}
+                      for name, dist in nearest]
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/nodes_in_region", methods=["POST"])
+def nodes_in_region():
+    global current_system
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Provide xmin, ymin, xmax, ymax or x, y, radius"}), 400
+
+        if not current_system:
+            return jsonify({"error": "No active simulation"}), 400
+
+        if data.get('radius') is not None:
+            if data.get('x') is None or data.get('y') is None:
+                return jsonify({"error": "x and y are required with radius"}), 400
+            found = current_system.nodes_within(float(data['x']), float(data['y']), float(data['radius']))
+            nodes = [{"name": name, "distance": dist} for name, dist in found]
+        elif all(data.get(key) is not None for key in ('xmin', 'ymin', 'xmax', 'ymax')):
+            found = current_system.nodes_in_region(float(data['xmin']), float(data['ymin']),
+                                                   float(data['xmax']), float(data['ymax']))
+            nodes = [{"name": name} for name in found]
+        else:
+            return jsonify({"error": "Provide xmin, ymin, xmax, ymax or x, y, radius"}), 400
+
+        for node in nodes:
+            node["type"] = current_system.node_types[node["name"]]
+        return jsonify({"success": True, "nodes": nodes})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/route", methods=["POST"])
+def single_route():
+    global current_system
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Both start and end nodes are required"}), 400
+        start = data.get('from')
+        end = data.get('to')
+
+        if not isinstance(start, str) or not isinstance(end, str) or not start or not end:
+            return jsonify({"error": "Both start and end nodes are required"}), 400
+
+        if not current_system:
+            return jsonify({"error": "No active simulation"}), 400
+
+        unknown = [node for node in (start, end) if node not in current_system.graph]
+        if unknown:
+            return jsonify({"error": f"Unknown node: {unknown[0]}"}), 400
+
+        path, cost = current_system.find_path(start, end)
+        return jsonify({
+            "success": True,
+            "from": start,
+            "to": end,
+            "path": path or [],
+            "cost": None if cost == float('inf') else cost
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/routes/batch", methods=["POST"])
+def batch_routes():
+    global current_system
+    try:
+        data = request.get_json(silent=True)
+        pairs = data.get('pairs') if isinstance(data, dict) else None
+
+        if not isinstance(pairs, list):
+            return jsonify({"error": "A list of origin/destination pairs is required"}), 400
+
+        if not current_system:
+            return jsonify({"error": "No active simulation"}), 400
+
+        queries = []
+        for pair in pairs:
+            if isinstance(pair, dict):
+                queries.append((pair.get('from'), pair.get('to')))
+            elif isinstance(pair, (list, tuple)) and len(pair) == 2:
+                queries.append((pair[0], pair[1]))
+            else:
+                return jsonify({"error": f"Invalid pair: {pair}"}), 400
+            if not all(isinstance(node, str) for node in queries[-1]):
+                return jsonify({"error": f"Origin and destination must be node names: {pair}"}), 400
+
+        results = current_system.batch_routes(queries)
+        return jsonify({
+            "success": True,
+            "routes": [{
+                "from": origin,
+                "to": destination,
+                "path": path or [],
+                "cost": None if cost == float('inf') else cost
+            } for (origin, destination), (path, cost) in zip(queries, results)]
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/distance_matrix", methods=["GET"])
+def distance_matrix():
+    global current_system
+    try:
+        if not current_system:
+            return jsonify({"error": "No active simulation"}), 400
+
+        matrix = current_system.distance_matrix()
+        return jsonify({
+            "success": True,
+            "nodes": matrix.nodes,
+            "distances": [[None if cost == float('inf') else cost for cost in row]
+                          for row in matrix.distances.tolist()]
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/run", methods=["POST"])
 def run_simulation():
     global current_system
@@ -224,6 +418,28 @@ def run_simulation():
             except ValueError as e:
                 return jsonify({"error": f"Supply {i+1}: {str(e)}"}), 400
             
+            # Optional stock count; left blank the supply is treated as unlimited
+            quantity = request.form.get(f"supply_quantity_{i}", "").strip()
+            if quantity:
+                try:
+                    quantity = int(quantity)
+                    if quantity < 0:
+                        raise ValueError
+                except ValueError:
+                    return jsonify({"error": f"Supply {i+1}: Invalid Supply quantity"}), 400
+            else:
+                quantity = None
+
+            # Optional volume per unit, only limiting vehicles that declare a volume capacity
+            volume = request.form.get(f"supply_volume_{i}", "").strip()
+            if volume:
+                try:
+                    volume = validate_positive_number(volume, "Supply volume")
+                except ValueError as e:
+                    return jsonify({"error": f"Supply {i+1}: {str(e)}"}), 400
+            else:
+                volume = None
+
             # Get category and food type
             category = request.form.get(f"supply_category_{i}", "non-food")
             food_type = request.form.get(f"food_type_{i}", "")
@@ -239,6 +455,10 @@ def run_simulation():
                 "category": category,
                 "food_type": food_type if category == "food" else None
             })
+            if quantity is not None:
+                supplies[-1]["quantity"] = quantity
+            if volume is not None:
+                supplies[-1]["volume"] = volume
 
         # Extract and validate vehicles
         vehicles = []
@@ -254,6 +474,9 @@ def run_simulation():
                 
             try:
                 capacity = validate_positive_number(request.form.get(f"vehicle_capacity_{i}"), "Vehicle capacity")
+                volume_capacity = request.form.get(f"vehicle_volume_{i}", "").strip()
+                volume_capacity = (validate_positive_number(volume_capacity, "Vehicle volume capacity")
+                                   if volume_capacity else None)
             except ValueError as e:
                 return jsonify({"error": f"Vehicle {i+1}: {str(e)}"}), 400
                 
@@ -263,6 +486,8 @@ def run_simulation():
                 "capacity": capacity,
                 "status": "available"
             })
+            if volume_capacity is not None:
+                vehicles[-1]["volume_capacity"] = volume_capacity
 
         # Extract and validate nodes
         nodes = []
@@ -356,7 +581,9 @@ def run_simulation():
                 "weight": weight
             })
 
-        # Create and store system instance
+        # Create and store system instance, releasing the previous one's planning pool
+        if current_system:
+            current_system.close()
         current_system = DisasterReliefSystem(supplies, vehicles, nodes, edges, demands)
         image_filename = current_system.run_simulation(save_img=True)
         
@@ -391,7 +618,9 @@ def demo(size):
     # Select demo data based on size
     demo_data = SMALL_DEMO if size == "small" else LARGE_DEMO
     
-    # Create and store system instance
+    # Create and store system instance, releasing the previous one's planning pool
+    if current_system:
+        current_system.close()
     current_system = DisasterReliefSystem(
         demo_data["supplies"],
         demo_data["vehicles"],
@@ -694,8 +923,10 @@ def load_log(filename):
         return jsonify({"error": "Log file not found or corrupted"}), 404
     
     try:
-        # Recreate the system from saved data
+        # Recreate the system from saved data, releasing the previous one's planning pool
         data = log_entry["data"]
+        if current_system:
+            current_system.close()
         current_system = DisasterReliefSystem(
             data["supplies"],
             data["vehicles"], 
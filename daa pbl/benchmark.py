@@ -0,0 +1,163 @@
+"""
+Routing benchmark for the disaster relief system.
+
+Compares the NetworkX-based searches with the compiled CSR graph engine
+on synthetic road networks. Run with:
+
+    python benchmark.py --nodes 20000 --queries 50
+"""
+import argparse
+import random
+import time
+
+import networkx as nx
+
+from core.graph import CSRGraph
+from core.astar import astar_path, csr_astar_path, csr_bidirectional_astar, calibrate_heuristic, heuristic_table
+from core.routing import compute_dijkstra, csr_dijkstra, csr_bidirectional_dijkstra
+from core.ch import ContractionHierarchy
+from core.landmarks import LandmarkIndex
+from core.cache import LRUCache
+
+def build_grid_network(side, seed=0):
+    """Build a side x side grid road network with random travel costs."""
+    rng = random.Random(seed)
+    graph = nx.grid_2d_graph(side, side)
+    graph = nx.relabel_nodes(graph, {node: f"N{node[0]}_{node[1]}" for node in graph.nodes()})
+    pos = {}
+    for node in graph.nodes():
+        x, y = node[1:].split("_")
+        pos[node] = (float(x), float(y))
+    for u, v in graph.edges():
+        graph[u][v]['weight'] = rng.uniform(1.0, 3.0)
+        graph[u][v]['blocked'] = False
+    return graph, pos
+
+def build_geometric_network(n, seed=0, degree=6.0):
+    """Build a connected random geometric road network with Euclidean costs."""
+    rng = random.Random(seed)
+    radius = (degree / (3.141592653589793 * n)) ** 0.5
+    pos = {f"N{i}": (rng.random(), rng.random()) for i in range(n)}
+
+    # Bucket points into radius-sized cells so only nearby pairs are compared
+    cells = {}
+    for node, (x, y) in pos.items():
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(node)
+
+    graph = nx.Graph()
+    graph.add_nodes_from(pos)
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for u in members:
+                    for v in cells.get((cx + dx, cy + dy), ()):
+                        if u < v:
+                            (x0, y0), (x1, y1) = pos[u], pos[v]
+                            dist = ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
+                            if dist <= radius:
+                                graph.add_edge(u, v, weight=dist, blocked=False)
+
+    largest = max(nx.connected_components(graph), key=len)
+    graph = graph.subgraph(largest).copy()
+    return graph, {node: pos[node] for node in graph.nodes()}
+
+def time_queries(search, queries):
+    """
+    Run every query once.
+
+    The search is called as search(s, t, stats); searches that fill in
+    stats['settled'] contribute to the settled node count.
+
+    Returns:
+        Tuple of (total seconds, list of costs, total settled nodes or None)
+    """
+    costs = []
+    settled = None
+    start = time.perf_counter()
+    for s, t in queries:
+        stats = {}
+        costs.append(search(s, t, stats)[1])
+        if 'settled' in stats:
+            settled = (settled or 0) + stats['settled']
+    return time.perf_counter() - start, costs, settled
+
+def run_benchmark(name, graph, pos, num_queries, seed=0):
+    rng = random.Random(seed)
+    nodes = list(graph.nodes())
+    queries = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(num_queries)]
+
+    start = time.perf_counter()
+    csr = CSRGraph.from_networkx(graph, pos)
+    build_time = time.perf_counter() - start
+
+    print(f"\n=== {name}: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges ===")
+    print(f"CSR build time: {build_time * 1000:.1f} ms")
+
+    scale = calibrate_heuristic(csr)
+    print(f"Calibrated heuristic scale: {scale:.4f}")
+
+    start = time.perf_counter()
+    landmarks = LandmarkIndex(csr, num_landmarks=8)
+    print(f"Landmark build time: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    ch = ContractionHierarchy.build(csr)
+    print(f"CH build time: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({len(ch.shortcuts)} shortcuts)")
+
+    searches = [
+        ("Dijkstra (networkx)", lambda s, t, st: compute_dijkstra(graph, s, t)),
+        ("Dijkstra (CSR)", lambda s, t, st: csr_dijkstra(csr, s, t, stats=st)),
+        ("Bidir Dijkstra (CSR)", lambda s, t, st: csr_bidirectional_dijkstra(csr, s, t, stats=st)),
+        ("A* (networkx)", lambda s, t, st: astar_path(graph, s, t, pos)),
+        ("A* (CSR)", lambda s, t, st: csr_astar_path(csr, s, t, stats=st, scale=scale)),
+        ("A* eps=1.5 (CSR)", lambda s, t, st: csr_astar_path(csr, s, t, stats=st, scale=scale, epsilon=1.5)),
+        ("A* ALT (CSR)", lambda s, t, st: csr_astar_path(csr, s, t, landmarks=landmarks, stats=st)),
+        ("Bidir A* ALT (CSR)", lambda s, t, st: csr_bidirectional_astar(csr, s, t, landmarks=landmarks, stats=st)),
+        ("Dijkstra (CH)", lambda s, t, st: ch.query(s, t)),
+    ]
+    baseline = {}
+    for label, search in searches:
+        elapsed, costs, settled = time_queries(search, queries)
+        family = "A*" if label.startswith("A*") else "Dijkstra"
+        if family in baseline:
+            mismatches = sum(abs(a - b) > 1e-9 for a, b in zip(baseline[family], costs))
+            note = f"| cost mismatches vs networkx: {mismatches}"
+        else:
+            baseline[family] = costs
+            note = ""
+        if settled is not None:
+            note = f"| {settled / num_queries:9.0f} settled/query " + note
+        print(f"{label:<22} {elapsed * 1000 / num_queries:8.2f} ms/query {note}")
+
+    # Many depots routing to a handful of hospitals/shelters
+    goals = [rng.choice(nodes) for _ in range(3)]
+    goal_queries = [(rng.choice(nodes), goals[i % len(goals)]) for i in range(num_queries)]
+    tables = LRUCache(16)
+
+    def cached_table(goal):
+        table = tables.get(goal)
+        if table is None:
+            table = heuristic_table(csr, csr.index[goal], landmarks)
+            tables.put(goal, table)
+        return table
+
+    print(f"Repeated goals ({len(goals)} goals):")
+    for label, search in [
+        ("A* ALT (CSR)", lambda s, t, st: csr_astar_path(csr, s, t, landmarks=landmarks)),
+        ("A* ALT (CSR, cached)", lambda s, t, st: csr_astar_path(csr, s, t, table=cached_table(t))),
+    ]:
+        elapsed, _, _ = time_queries(search, goal_queries)
+        print(f"{label:<22} {elapsed * 1000 / num_queries:8.2f} ms/query")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark routing engines")
+    parser.add_argument("--nodes", type=int, default=10000, help="Approximate number of nodes")
+    parser.add_argument("--queries", type=int, default=30, help="Number of random queries")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    side = max(2, int(args.nodes ** 0.5))
+    run_benchmark("Grid", *build_grid_network(side, args.seed), args.queries, args.seed)
+    run_benchmark("Random geometric", *build_geometric_network(args.nodes, args.seed),
+                  args.queries, args.seed)
@@ -1,11 +1,38 @@
 from heapq import heappush, heappop
 import numpy as np
+from core.graph import closure_bits
+from core.routing import bidirectional_search
 
 def heuristic(pos1, pos2):
     """Calculate Euclidean distance between two points."""
     return np.sqrt((pos2[0] - pos1[0]) ** 2 + (pos2[1] - pos1[1]) ** 2)
 
-def astar_path(graph, start, goal, positions):
+def calibrate_heuristic(csr):
+    """
+    Derive the largest factor the Euclidean heuristic can be scaled by safely.
+
+    The factor is the minimum of weight / straight-line length over all
+    edges. Scaling the Euclidean distance by it never overestimates any
+    edge, hence never overestimates any path, and keeps the heuristic
+    consistent. Closing roads only removes edges, so the factor of the
+    base graph stays safe under every closure set.
+    Args:
+        csr: CSRGraph snapshot
+    Returns:
+        scale: Heuristic scaling factor (1.0 for a graph without edges)
+    """
+    if not csr.num_edges:
+        return 1.0
+    ends = csr.positions[csr.edges]
+    lengths = np.hypot(ends[:, 0, 0] - ends[:, 1, 0], ends[:, 0, 1] - ends[:, 1, 1])
+    # Edges between coincident points put no constraint on the factor
+    positive = lengths > 0
+    if not positive.any():
+        return 1.0
+    return float(np.min(csr.edge_weights[positive] / lengths[positive]))
+
+def astar_path(graph, start, goal, positions, closures=None, landmarks=None,
+               scale=1.0, epsilon=1.0, table=None, index=None):
     """
     Find the shortest path between start and goal using A* algorithm.
     Args:
@@ -13,6 +40,13 @@ def astar_path(graph, start, goal, positions):
         start: Starting node
         goal: Target node
         positions: Dictionary of node positions {node: (x, y)}
+        closures: Optional ClosureMask of roads to avoid
+        landmarks: Optional LandmarkIndex; uses ALT bounds instead of Euclidean distance
+        scale: Factor applied to the Euclidean distance (see calibrate_heuristic)
+        epsilon: Weighted A* inflation; the cost is at most epsilon times optimal
+        table: Optional precomputed heuristic_table() for goal; replaces
+            landmarks, scale and epsilon
+        index: Node name -> table position mapping (CSRGraph.index), required with table
     Returns:
         path: List of nodes in the path
         cost: Total cost of the path
@@ -20,6 +54,15 @@ def astar_path(graph, start, goal, positions):
     if start not in graph or goal not in graph:
         return None, float('inf')
 
+    if table is not None:
+        estimate = lambda node: table[index[node]]
+    elif landmarks is not None:
+        bounds = epsilon * landmarks.heuristic(landmarks.index[goal])
+        estimate = lambda node: bounds[landmarks.index[node]]
+    else:
+        factor = epsilon * scale
+        estimate = lambda node: factor * heuristic(positions[node], positions[goal])
+
     frontier = []
     heappush(frontier, (0, start))
     
@@ -36,12 +79,14 @@ def astar_path(graph, start, goal, positions):
             # Skip if the edge is blocked
             if graph[current][next_node].get('blocked', False):
                 continue
+            if closures is not None and closures.blocks(current, next_node):
+                continue
                 
             new_cost = cost_so_far[current] + graph[current][next_node]['weight']
             
             if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
                 cost_so_far[next_node] = new_cost
-                priority = new_cost + heuristic(positions[next_node], positions[goal])
+                priority = new_cost + estimate(next_node)
                 heappush(frontier, (priority, next_node))
                 came_from[next_node] = current
     
@@ -58,4 +103,143 @@ def astar_path(graph, start, goal, positions):
         current = came_from[current]
     
     path.reverse()
-    return path, total_cost 
\ No newline at end of file
+    return path, total_cost
+
+def goal_bounds(csr, goal, landmarks=None, scale=1.0):
+    """Return estimates of the distance from every node id to goal as an array."""
+    if landmarks is not None:
+        return landmarks.heuristic(goal)
+    return scale * np.hypot(csr.positions[:, 0] - csr.positions[goal, 0],
+                            csr.positions[:, 1] - csr.positions[goal, 1])
+
+def heuristic_table(csr, goal, landmarks=None, scale=1.0, epsilon=1.0):
+    """
+    Precompute the A* heuristic for one goal as a list indexed by node id.
+
+    The table is built with a single NumPy expression over all node
+    positions (or landmark distances), so repeated queries to the same goal
+    can skip the per-query heuristic computation.
+    Args:
+        csr: CSRGraph snapshot
+        goal: Goal node id
+        landmarks: Optional LandmarkIndex; uses ALT bounds instead of Euclidean distance
+        scale: Factor applied to the Euclidean distance (see calibrate_heuristic)
+        epsilon: Weighted A* inflation
+    Returns:
+        table: List of heuristic values, one per node id
+    """
+    return (epsilon * goal_bounds(csr, goal, landmarks, scale)).tolist()
+
+def csr_astar_path(csr, start, goal, closures=None, landmarks=None, stats=None,
+                   scale=1.0, epsilon=1.0, table=None):
+    """
+    Find the shortest path between start and goal using A* on a compiled graph.
+    Args:
+        csr: CSRGraph snapshot
+        start: Starting node
+        goal: Target node
+        closures: Optional ClosureMask of roads to avoid
+        landmarks: Optional LandmarkIndex; uses ALT bounds instead of Euclidean distance
+        stats: Optional dict that receives the number of 'settled' nodes
+        scale: Factor applied to the Euclidean distance (see calibrate_heuristic)
+        epsilon: Weighted A* inflation; with a consistent heuristic the cost
+            is at most epsilon times optimal, usually with far fewer nodes settled
+        table: Optional precomputed heuristic_table() for goal; replaces
+            landmarks, scale and epsilon
+    Returns:
+        path: List of nodes in the path
+        cost: Total cost of the path
+    """
+    if start not in csr.index or goal not in csr.index:
+        return None, float('inf')
+
+    indptr, indices, weights, edge_ids = csr._indptr, csr._indices, csr._weights, csr._edge_ids
+    bits = closure_bits(csr, closures)
+    source, target = csr.index[start], csr.index[goal]
+
+    # Heuristic for every node at once instead of one np.sqrt per relaxation
+    h = table if table is not None else heuristic_table(csr, target, landmarks, scale, epsilon)
+
+    frontier = []
+    heappush(frontier, (0, 0, source))
+
+    came_from = [-1] * csr.num_nodes
+    cost_so_far = [float('inf')] * csr.num_nodes
+    cost_so_far[source] = 0
+    settled = 0
+
+    while frontier:
+        _, g, current = heappop(frontier)
+
+        # Stale queue entry: a cheaper route to this node was found later
+        if g > cost_so_far[current]:
+            continue
+        settled += 1
+
+        if current == target:
+            break
+
+        lo, hi = indptr[current], indptr[current + 1]
+        for next_node, weight, edge in zip(indices[lo:hi], weights[lo:hi], edge_ids[lo:hi]):
+            # Skip if the edge is blocked
+            if bits[edge >> 3] & (128 >> (edge & 7)):
+                continue
+
+            new_cost = g + weight
+
+            if new_cost < cost_so_far[next_node]:
+                cost_so_far[next_node] = new_cost
+                heappush(frontier, (new_cost + h[next_node], new_cost, next_node))
+                came_from[next_node] = current
+
+    if stats is not None:
+        stats['settled'] = settled
+
+    if cost_so_far[target] == float('inf'):
+        return None, float('inf')
+
+    # Reconstruct path
+    path = []
+    current = target
+    while current != -1:
+        path.append(current)
+        current = came_from[current]
+
+    path.reverse()
+    return csr.path_names(path), cost_so_far[target]
+
+def csr_bidirectional_astar(csr, start, goal, closures=None, landmarks=None, stats=None,
+                            scale=1.0):
+    """
+    Find the shortest path between start and goal using bidirectional A*.
+
+    Both searches use the average potential p(v) = (h_goal(v) - h_start(v)) / 2,
+    which is consistent for the forward and the backward search whenever the
+    underlying heuristic is, so the result is optimal with ALT landmarks or a
+    calibrated Euclidean scale.
+    Args:
+        csr: CSRGraph snapshot
+        start: Starting node
+        goal: Target node
+        closures: Optional ClosureMask of roads to avoid
+        landmarks: Optional LandmarkIndex; uses ALT bounds instead of Euclidean distance
+        stats: Optional dict that receives the number of 'settled' nodes
+        scale: Factor applied to the Euclidean distance (see calibrate_heuristic)
+    Returns:
+        path: List of nodes in the path
+        cost: Total cost of the path
+    """
+    if start not in csr.index or goal not in csr.index:
+        return None, float('inf')
+
+    source, target = csr.index[start], csr.index[goal]
+    to_goal = goal_bounds(csr, target, landmarks, scale)
+    to_start = goal_bounds(csr, source, landmarks, scale)
+    # inf - inf marks nodes cut off from both ends; they are never reached anyway
+    with np.errstate(invalid='ignore'):
+        potential = np.nan_to_num((to_goal - to_start) / 2, nan=0.0)
+
+    path, cost = bidirectional_search(csr, source, target, closures, potential.tolist(), stats)
+    if not path:
+        return None, float('inf')
+    return csr.path_names(path), cost
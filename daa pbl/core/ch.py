@@ -0,0 +1,282 @@
+from typing import List, Tuple, Optional
+import hashlib
+import heapq
+import math
+import pickle
+import numpy as np
+from core.graph import CSRGraph, ClosureMask, closure_bits
+
+def graph_fingerprint(csr: CSRGraph, closures: Optional[ClosureMask] = None) -> str:
+    """Hash of the nodes, edges, weights and closures a hierarchy was built for."""
+    digest = hashlib.sha1()
+    digest.update(repr(csr.nodes).encode())
+    digest.update(csr.edges.tobytes())
+    digest.update(csr.edge_weights.tobytes())
+    digest.update(closure_bits(csr, closures))
+    return digest.hexdigest()
+
+class ContractionHierarchy:
+    """
+    Contraction Hierarchies (CH) index for fast shortest path queries.
+
+    Preprocessing contracts the nodes one by one in order of importance,
+    adding a shortcut edge whenever removing a node would destroy the only
+    shortest path between two of its neighbors. A query then runs two small
+    Dijkstra searches, from the start and from the goal, that only follow
+    edges towards more important nodes, and meets in the middle.
+
+    The index is built for one set of closed roads. It must be rebuilt when
+    the road network or the closures change (see matches()).
+    """
+
+    def __init__(self, nodes: List, rank: np.ndarray, up_indptr: np.ndarray,
+                 up_indices: np.ndarray, up_weights: np.ndarray,
+                 shortcuts: np.ndarray, fingerprint: str):
+        """
+        Args:
+            nodes: List of node names; list position is the node id
+            rank: Contraction order of each node (higher is more important)
+            up_indptr, up_indices, up_weights: CSR arrays of the upward graph,
+                holding for each node its edges to higher ranked nodes
+            shortcuts: Array of shape (k, 3) with (u, v, middle node) rows
+            fingerprint: graph_fingerprint() of the graph the index was built on
+        """
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.up_indptr = np.asarray(up_indptr, dtype=np.int64)
+        self.up_indices = np.asarray(up_indices, dtype=np.int64)
+        self.up_weights = np.asarray(up_weights, dtype=float)
+        self.shortcuts = np.asarray(shortcuts, dtype=np.int64).reshape(-1, 3)
+        self.fingerprint = fingerprint
+
+        self._indptr = self.up_indptr.tolist()
+        self._indices = self.up_indices.tolist()
+        self._weights = self.up_weights.tolist()
+        self._middle = {}
+        for u, v, middle in self.shortcuts.tolist():
+            self._middle[(u, v)] = middle
+            self._middle[(v, u)] = middle
+
+    @classmethod
+    def build(cls, csr: CSRGraph, closures: Optional[ClosureMask] = None,
+              witness_limit: int = 64) -> "ContractionHierarchy":
+        """
+        Contract every node of a compiled graph.
+
+        Args:
+            csr: Compiled CSRGraph snapshot
+            closures: Optional ClosureMask of roads left out of the index
+            witness_limit: Maximum nodes settled per witness search; lower
+                values build faster but may add unnecessary shortcuts
+
+        Returns:
+            ContractionHierarchy index
+        """
+        n = csr.num_nodes
+        bits = closure_bits(csr, closures)
+
+        # Working graph: neighbor -> (weight, middle node or -1)
+        adj = [dict() for _ in range(n)]
+        for edge, ((u, v), w) in enumerate(zip(csr.edges.tolist(), csr.edge_weights.tolist())):
+            if u == v or bits[edge >> 3] & (128 >> (edge & 7)):
+                continue
+            if v not in adj[u] or w < adj[u][v][0]:
+                adj[u][v] = (w, -1)
+                adj[v][u] = (w, -1)
+
+        def witness_distances(source, skip, max_cost, targets):
+            dist = {source: 0}
+            pq = [(0, source)]
+            remaining = set(targets)
+            settled = 0
+            inf = math.inf
+            while pq and remaining and settled < witness_limit:
+                d, node = heapq.heappop(pq)
+                if d > dist[node]:
+                    continue
+                if d > max_cost:
+                    break
+                settled += 1
+                remaining.discard(node)
+                for neighbor, (w, _) in adj[node].items():
+                    if neighbor == skip:
+                        continue
+                    candidate = d + w
+                    if candidate < dist.get(neighbor, inf):
+                        dist[neighbor] = candidate
+                        heapq.heappush(pq, (candidate, neighbor))
+            return dist
+
+        def needed_shortcuts(v):
+            neighbors = list(adj[v].items())
+            shortcuts = []
+            for i, (u, (wu, _)) in enumerate(neighbors):
+                others = neighbors[i + 1:]
+                if not others:
+                    break
+                max_cost = wu + max(w for _, (w, _) in others)
+                dist = witness_distances(u, v, max_cost, [x for x, _ in others])
+                for x, (wx, _) in others:
+                    if dist.get(x, math.inf) > wu + wx:
+                        shortcuts.append((u, x, wu + wx))
+            return shortcuts
+
+        depth = [0] * n  # Deleted-neighbors term keeps contraction spread out
+        # Shortcuts contracting each node would add; only changes when a neighbor is
+        # contracted, so the witness searches rerun just for those (stale) nodes
+        shortcuts_of = [needed_shortcuts(v) for v in range(n)]
+        stale = set()
+
+        def priority(v):
+            if v in stale:
+                stale.discard(v)
+                shortcuts_of[v] = needed_shortcuts(v)
+            return len(shortcuts_of[v]) - len(adj[v]) + depth[v]
+
+        pq = [(priority(v), v) for v in range(n)]
+        heapq.heapify(pq)
+        rank = np.zeros(n, dtype=np.int64)
+        upward = [None] * n
+        shortcut_rows = []
+        order = 0
+
+        while pq:
+            _, v = heapq.heappop(pq)
+            # Lazy update: re-queue if the node became less attractive
+            fresh = v in stale
+            current = priority(v)
+            if pq and current > pq[0][0]:
+                heapq.heappush(pq, (current, v))
+                continue
+
+            # A list computed before other contractions may rely on witnesses that are gone
+            shortcuts = shortcuts_of[v] if fresh else needed_shortcuts(v)
+            shortcuts_of[v] = None
+            for u, x, w in shortcuts:
+                if x not in adj[u] or w < adj[u][x][0]:
+                    adj[u][x] = (w, v)
+                    adj[x][u] = (w, v)
+
+            upward[v] = adj[v]
+            for u in adj[v]:
+                del adj[u][v]
+                depth[u] = max(depth[u], depth[v] + 1)
+            adj[v] = {}
+            stale.update(upward[v])
+            rank[v] = order
+            order += 1
+
+        up_indptr = [0]
+        up_indices = []
+        up_weights = []
+        for v in range(n):
+            for u, (w, middle) in upward[v].items():
+                up_indices.append(u)
+                up_weights.append(w)
+                if middle != -1:
+                    shortcut_rows.append((v, u, middle))
+            up_indptr.append(len(up_indices))
+
+        return cls(csr.nodes, rank, np.array(up_indptr), np.array(up_indices, dtype=np.int64),
+                   np.array(up_weights, dtype=float), np.array(shortcut_rows, dtype=np.int64),
+                   graph_fingerprint(csr, closures))
+
+    def matches(self, csr: CSRGraph, closures: Optional[ClosureMask] = None) -> bool:
+        """Return True if the index was built for this graph and closure set."""
+        return self.fingerprint == graph_fingerprint(csr, closures)
+
+    def _unpack(self, u: int, v: int, out: List[int]):
+        """Append the original-edge path from u (exclusive) to v (inclusive)."""
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            middle = self._middle.get((a, b))
+            if middle is None:
+                out.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+    def query(self, start, goal) -> Tuple[List, float]:
+        """
+        Find the shortest path between start and goal.
+
+        Args:
+            start: Starting node
+            goal: Target node
+
+        Returns:
+            Tuple of (path list, total cost); ([], inf) if unreachable
+        """
+        if start not in self.index or goal not in self.index:
+            return [], float('inf')
+
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        source, target = self.index[start], self.index[goal]
+        dist = ({source: 0}, {target: 0})
+        parent = ({source: -1}, {target: -1})
+        queues = ([(0, source)], [(0, target)])
+        best, meet = float('inf'), -1
+        if source == target:
+            best, meet = 0, source
+
+        while queues[0] or queues[1]:
+            # Advance the direction with the smaller tentative distance
+            side = 0 if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]) else 1
+            d, node = heapq.heappop(queues[side])
+            if d >= best:
+                break  # Neither direction can still improve the meeting cost
+            if d > dist[side][node]:
+                continue
+
+            other = dist[1 - side].get(node)
+            if other is not None and d + other < best:
+                best, meet = d + other, node
+
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[k]
+                candidate = d + weights[k]
+                if candidate < dist[side].get(neighbor, float('inf')):
+                    dist[side][neighbor] = candidate
+                    parent[side][neighbor] = node
+                    heapq.heappush(queues[side], (candidate, neighbor))
+
+        if meet == -1:
+            return [], float('inf')
+
+        # Upward chains: start -> meet and goal -> meet
+        up_path = [meet]
+        while parent[0][up_path[-1]] != -1:
+            up_path.append(parent[0][up_path[-1]])
+        up_path.reverse()
+        down_path = [meet]
+        while parent[1][down_path[-1]] != -1:
+            down_path.append(parent[1][down_path[-1]])
+
+        hops = up_path + down_path[1:]
+        path = [hops[0]]
+        for a, b in zip(hops, hops[1:]):
+            self._unpack(a, b, path)
+        return [self.nodes[i] for i in path], best
+
+    def save(self, filename: str):
+        """Persist the index to a file."""
+        with open(filename, 'wb') as f:
+            pickle.dump({
+                "nodes": self.nodes,
+                "rank": self.rank,
+                "up_indptr": self.up_indptr,
+                "up_indices": self.up_indices,
+                "up_weights": self.up_weights,
+                "shortcuts": self.shortcuts,
+                "fingerprint": self.fingerprint
+            }, f)
+
+    @classmethod
+    def load(cls, filename: str) -> "ContractionHierarchy":
+        """Load an index saved with save()."""
+        with open(filename, 'rb') as f:
+            data = pickle.load(f)
+        return cls(data["nodes"], data["rank"], data["up_indptr"], data["up_indices"],
+                   data["up_weights"], data["shortcuts"], data["fingerprint"])
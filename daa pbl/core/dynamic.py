@@ -0,0 +1,163 @@
+from typing import List, Set, Optional, Union
+import heapq
+from core.graph import CSRGraph, ClosureMask, closure_bits
+from core.routing import shortest_path_tree, tree_path
+
+class DynamicShortestPathTree:
+    """
+    Shortest path tree from a fixed source that is repaired in place when
+    roads are blocked or unblocked.
+
+    The tree may also be grown from several sources at once (e.g. every
+    warehouse); each node then hangs below its nearest source, i.e. the
+    first node of its path, and the repairs keep that assignment up to date.
+
+    Blocking a road only affects the subtree hanging below it (if the road
+    is a tree edge at all), and unblocking a road only affects the nodes
+    whose distance it improves. Both repairs run a Dijkstra search limited
+    to those nodes, so the cost of an update is proportional to its impact
+    rather than to the size of the network.
+
+    The repair methods receive the closure mask that is in force after the
+    change; the tree keeps it for subsequent repairs.
+    """
+
+    def __init__(self, csr: CSRGraph, source: Union[int, List[int]],
+                 closures: Optional[ClosureMask] = None):
+        """
+        Build the full shortest path tree.
+
+        Args:
+            csr: Compiled CSRGraph snapshot
+            source: Source node id, or a list of source node ids
+            closures: Optional ClosureMask of roads to avoid
+        """
+        self.csr = csr
+        self.source = source
+        self.sources = [source] if isinstance(source, int) else list(source)
+        self.closures = closures
+        self.dist, self.parent = shortest_path_tree(csr, source, closures=closures)
+        self.children = [set() for _ in range(csr.num_nodes)]
+        for node, parent in enumerate(self.parent):
+            if parent != -1:
+                self.children[parent].add(node)
+
+    def path(self, target: int) -> List[int]:
+        """Return the node id path from the source to target, or [] if unreachable."""
+        if self.dist[target] == float('infinity'):
+            return []
+        return tree_path(self.parent, target)
+
+    def _set_parent(self, node: int, parent: int):
+        old = self.parent[node]
+        if old != -1:
+            self.children[old].discard(node)
+        self.parent[node] = parent
+        if parent != -1:
+            self.children[parent].add(node)
+
+    def _subtree(self, root: int) -> Set[int]:
+        nodes = {root}
+        stack = [root]
+        while stack:
+            for child in self.children[stack.pop()]:
+                nodes.add(child)
+                stack.append(child)
+        return nodes
+
+    def _propagate(self, pq: list, changed: Set[int]):
+        """Run Dijkstra from the seeded queue, recording every improved node."""
+        csr = self.csr
+        indptr, indices, weights, edge_ids = csr._indptr, csr._indices, csr._weights, csr._edge_ids
+        bits = closure_bits(csr, self.closures)
+        dist = self.dist
+
+        while pq:
+            d, node = heapq.heappop(pq)
+            if d > dist[node]:
+                continue
+
+            lo, hi = indptr[node], indptr[node + 1]
+            for neighbor, weight, edge in zip(indices[lo:hi], weights[lo:hi], edge_ids[lo:hi]):
+                if bits[edge >> 3] & (128 >> (edge & 7)):
+                    continue
+                candidate = d + weight
+                if candidate < dist[neighbor]:
+                    dist[neighbor] = candidate
+                    self._set_parent(neighbor, node)
+                    changed.add(neighbor)
+                    heapq.heappush(pq, (candidate, neighbor))
+
+    def block_edge(self, edge: int, closures: ClosureMask) -> Set[int]:
+        """
+        Repair the tree after an edge was blocked.
+
+        Args:
+            edge: Edge id of the newly blocked edge
+            closures: ClosureMask in force after the block (includes edge)
+
+        Returns:
+            Set of node ids whose shortest path changed
+        """
+        self.closures = closures
+        u, v = self.csr.edges[edge].tolist()
+        if self.parent[v] == u:
+            root = v
+        elif self.parent[u] == v:
+            root = u
+        else:
+            return set()  # Not a tree edge, no path used it
+
+        csr = self.csr
+        indptr, indices, weights, edge_ids = csr._indptr, csr._indices, csr._weights, csr._edge_ids
+        bits = closure_bits(csr, closures)
+
+        affected = self._subtree(root)
+        for node in affected:
+            self.dist[node] = float('infinity')
+            self._set_parent(node, -1)
+
+        # Reattach each orphaned node through its best neighbor outside the subtree
+        pq = []
+        for node in affected:
+            lo, hi = indptr[node], indptr[node + 1]
+            for neighbor, weight, edge_id in zip(indices[lo:hi], weights[lo:hi], edge_ids[lo:hi]):
+                if bits[edge_id >> 3] & (128 >> (edge_id & 7)) or neighbor in affected:
+                    continue
+                candidate = self.dist[neighbor] + weight
+                if candidate < self.dist[node]:
+                    self.dist[node] = candidate
+                    self._set_parent(node, neighbor)
+            if self.dist[node] != float('infinity'):
+                heapq.heappush(pq, (self.dist[node], node))
+
+        self._propagate(pq, set())
+        return affected
+
+    def unblock_edge(self, edge: int, closures: ClosureMask) -> Set[int]:
+        """
+        Repair the tree after an edge was unblocked.
+
+        Args:
+            edge: Edge id of the newly usable edge
+            closures: ClosureMask in force after the unblock
+
+        Returns:
+            Set of node ids whose shortest path changed
+        """
+        self.closures = closures
+        u, v = self.csr.edges[edge].tolist()
+        weight = float(self.csr.edge_weights[edge])
+        changed = set()
+        pq = []
+
+        for a, b in ((u, v), (v, u)):
+            candidate = self.dist[a] + weight
+            if candidate < self.dist[b]:
+                self.dist[b] = candidate
+                self._set_parent(b, a)
+                changed.add(b)
+                heapq.heappush(pq, (candidate, b))
+
+        self._propagate(pq, changed)
+        return changed
@@ -0,0 +1,186 @@
+from typing import Dict, List, Tuple, Optional, Iterable
+import numpy as np
+import networkx as nx
+
+class CSRGraph:
+    """
+    Compact, array-backed snapshot of an undirected road network.
+
+    Nodes are mapped to integer ids 0..n-1 and adjacency is stored in
+    compressed sparse row (CSR) form: the neighbors of node ``u`` are
+    ``indices[indptr[u]:indptr[u + 1]]`` with matching ``weights`` and
+    ``edge_ids``. Every undirected road appears twice in the adjacency
+    (once per direction) but has a single edge id, so per-edge state such
+    as blocking can be stored in one array of length ``num_edges``.
+
+    A snapshot is never modified after it is built. Road closures are
+    layered on top of it with a ClosureMask, so any number of closure
+    scenarios can share (and concurrently search) the same snapshot.
+
+    The NumPy arrays are the canonical representation. Plain Python list
+    copies are kept alongside them because element access on lists is
+    much faster than on NumPy arrays inside the pure-Python search loops.
+    """
+
+    def __init__(self, nodes: List, positions: np.ndarray, edges: np.ndarray,
+                 edge_weights: np.ndarray):
+        """
+        Build the CSR arrays from an edge list.
+
+        Args:
+            nodes: List of node names; list position is the node id
+            positions: Array of shape (n, 2) with node coordinates
+            edges: Array of shape (m, 2) with (u, v) node id pairs
+            edge_weights: Array of shape (m,) with edge weights
+        """
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.positions = np.asarray(positions, dtype=float).reshape(len(self.nodes), 2)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.edge_weights = np.asarray(edge_weights, dtype=float)
+        m = len(self.edges)
+
+        n = len(self.nodes)
+        # Each undirected edge contributes one entry per direction
+        src = np.concatenate([self.edges[:, 0], self.edges[:, 1]])
+        dst = np.concatenate([self.edges[:, 1], self.edges[:, 0]])
+        eid = np.concatenate([np.arange(m), np.arange(m)])
+        order = np.argsort(src, kind='stable')
+
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = dst[order]
+        self.edge_ids = eid[order]
+        self.weights = self.edge_weights[self.edge_ids]
+
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self._weights = self.weights.tolist()
+        self._edge_ids = self.edge_ids.tolist()
+        self._edge_lookup = None
+
+    @classmethod
+    def from_networkx(cls, graph: nx.Graph, positions: Dict) -> "CSRGraph":
+        """
+        Compile a NetworkX graph into a CSR snapshot.
+
+        Args:
+            graph: NetworkX graph with 'weight' edge attributes
+            positions: Dictionary of node positions {node: (x, y)}
+
+        Returns:
+            CSRGraph snapshot of the graph
+        """
+        nodes = list(graph.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        coords = np.array([positions[node] for node in nodes], dtype=float).reshape(len(nodes), 2)
+
+        edges = []
+        weights = []
+        for u, v, data in graph.edges(data=True):
+            edges.append((index[u], index[v]))
+            weights.append(data['weight'])
+
+        return cls(nodes, coords, np.array(edges, dtype=np.int64).reshape(-1, 2),
+                   np.array(weights, dtype=float))
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+    def edge_id(self, u, v) -> Optional[int]:
+        """Return the edge id of the road between nodes named u and v, or None."""
+        if self._edge_lookup is None:
+            self._edge_lookup = {}
+            for k, (a, b) in enumerate(self.edges.tolist()):
+                self._edge_lookup[(a, b)] = k
+                self._edge_lookup[(b, a)] = k
+        if u not in self.index or v not in self.index:
+            return None
+        return self._edge_lookup.get((self.index[u], self.index[v]))
+
+    def neighbors(self, u: int) -> List[Tuple[int, float, int]]:
+        """Return (neighbor id, weight, edge id) triples for node id ``u``."""
+        start, end = self._indptr[u], self._indptr[u + 1]
+        return list(zip(self._indices[start:end], self._weights[start:end],
+                        self._edge_ids[start:end]))
+
+    def path_names(self, path: List[int]) -> List:
+        """Translate a list of node ids back into node names."""
+        return [self.nodes[i] for i in path]
+
+class ClosureMask:
+    """
+    Immutable set of closed roads layered over a CSRGraph snapshot.
+
+    The closed edges are stored as a bitmask packed with ``np.packbits``
+    (one bit per edge id), so a scenario costs ``num_edges / 8`` bytes and
+    the base graph is never copied or mutated. Edge ``e`` is closed when
+    ``bits[e >> 3] & (128 >> (e & 7))`` is non-zero; the search loops test
+    the bytes directly.
+    """
+
+    def __init__(self, base: CSRGraph, bits: bytes):
+        self.base = base
+        self.bits = bytes(bits)
+
+    @classmethod
+    def open(cls, base: CSRGraph) -> "ClosureMask":
+        """Mask with every road open."""
+        return cls(base, bytes((base.num_edges + 7) // 8))
+
+    @classmethod
+    def from_edges(cls, base: CSRGraph, edges: Iterable[int]) -> "ClosureMask":
+        """Mask closing the given edge ids."""
+        flags = np.zeros(base.num_edges, dtype=bool)
+        flags[list(edges)] = True
+        return cls(base, np.packbits(flags).tobytes())
+
+    @classmethod
+    def from_roads(cls, base: CSRGraph, roads: Iterable[Tuple]) -> "ClosureMask":
+        """Mask closing the given (from, to) roads; unknown roads are ignored."""
+        edges = [base.edge_id(u, v) for u, v in roads]
+        return cls.from_edges(base, [e for e in edges if e is not None])
+
+    def is_closed(self, edge: int) -> bool:
+        return bool(self.bits[edge >> 3] & (128 >> (edge & 7)))
+
+    def blocks(self, u, v) -> bool:
+        """Return True if the road between nodes named u and v is closed."""
+        edge = self.base.edge_id(u, v)
+        return edge is not None and self.is_closed(edge)
+
+    def closed_edges(self) -> List[int]:
+        """Return the ids of all closed edges."""
+        flags = np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), count=self.base.num_edges)
+        return np.flatnonzero(flags).tolist()
+
+    def with_closed(self, *edges: int) -> "ClosureMask":
+        """Return a new mask with the given edges also closed."""
+        bits = bytearray(self.bits)
+        for edge in edges:
+            bits[edge >> 3] |= 128 >> (edge & 7)
+        return ClosureMask(self.base, bits)
+
+    def with_open(self, *edges: int) -> "ClosureMask":
+        """Return a new mask with the given edges reopened."""
+        bits = bytearray(self.bits)
+        for edge in edges:
+            bits[edge >> 3] &= ~(128 >> (edge & 7)) & 0xFF
+        return ClosureMask(self.base, bits)
+
+    def __eq__(self, other):
+        return isinstance(other, ClosureMask) and self.base is other.base and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+def closure_bits(csr: CSRGraph, closures: Optional[ClosureMask]) -> bytes:
+    """Return the closure bitmask to test in a search loop (all open if None)."""
+    if closures is None:
+        return bytes((csr.num_edges + 7) // 8)
+    return closures.bits
@@ -1,74 +1,968 @@
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, Optional, Union, Sequence, Callable
+from functools import reduce, partial
+from bisect import bisect_right
+from itertools import combinations
+from concurrent.futures import Executor, ProcessPoolExecutor
+import math
+import time
 import numpy as np
 
-def knapsack(items: List[Dict], capacity: float) -> Tuple[float, List[int]]:
+# Default memory allowed for the knapsack decision table, in bytes
+KNAPSACK_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Above this many table cells (items x capacity) the DP is left to the search solvers
+DP_MAX_CELLS = 50_000_000
+
+# Meet in the middle enumerates 2 ** (n / 2) subsets of each half of the items
+MEET_IN_MIDDLE_MAX_ITEMS = 32
+
+# Below this many DP cells in total (about 60 ms of work) the loads are solved in
+# process: sending them to worker processes costs more than it saves
+MIN_PARALLEL_WORK = 20_000_000
+
+# Weight + volume loads: the exact Pareto DP is tried up to this many items, and
+# abandoned for the Lagrangian solver if its state set grows past PARETO_MAX_STATES
+PARETO_MAX_ITEMS = 64
+PARETO_MAX_STATES = 20_000
+
+def integer_weights(items: List[Dict], capacity: Union[float, Sequence[float]],
+                    resolution: Optional[float] = None) -> Tuple[List[int], Union[int, List[int]]]:
+    """
+    Convert item weights and capacity to the smallest equivalent integer table
+    
+    Without a resolution weights and capacity are truncated with int(). With
+    a resolution (e.g. 0.01 kg) weights are measured in multiples of it,
+    rounded up so a load never weighs more than planned, and the capacity
+    is rounded down. Weights are then divided by their greatest common
+    divisor g and the capacity is floor-divided by it: every load weighs a
+    multiple of g, so it fits c exactly when it fits c // g, and the table
+    shrinks without changing any answer.
+    
+    Args:
+        items: List of dictionaries with a 'weight' key
+        capacity: Maximum weight capacity, or a list of capacities (one
+            per vehicle) sharing the same weight unit
+        resolution: Optional weight unit; None keeps the int() truncation
+        
+    Returns:
+        Tuple of (integer weight per item, integer capacity or list of them)
+    """
+    several = not isinstance(capacity, (int, float))
+    capacities = list(capacity) if several else [capacity]
+    if resolution is None:
+        weights = [int(item['weight']) for item in items]
+        caps = [int(c) for c in capacities]
+    else:
+        # The tolerance absorbs float noise such as 3.3 / 0.1 == 32.999999999999996
+        weights = [math.ceil(item['weight'] / resolution - 1e-9) for item in items]
+        caps = [math.floor(c / resolution + 1e-9) for c in capacities]
+
+    divisor = reduce(math.gcd, weights, 0)
+    if divisor > 1:
+        weights = [w // divisor for w in weights]
+        caps = [c // divisor for c in caps]
+    return weights, caps if several else caps[0]
+
+def knapsack_fingerprint(items: List[Dict], capacity: float,
+                         resolution: Optional[float] = None,
+                         volume_capacity: Optional[float] = None) -> Tuple:
+    """
+    Canonical, hashable key of a (bounded) knapsack instance
+    
+    Two instances get the same key when they are the same problem after
+    conversion to integer weights (see integer_weights): item order does
+    not matter, weights that round to the same units match, and stock
+    beyond what could ever fit counts as equal. Results can therefore be
+    memoized under this key and looked up by item name.
+    
+    Args:
+        items: List of dictionaries with 'name', 'value', 'weight' and
+            optional 'quantity' and 'volume' keys
+        capacity: Maximum weight capacity
+        resolution: Optional weight unit (see integer_weights)
+        volume_capacity: Optional maximum volume; None ignores volumes
+        
+    Returns:
+        Tuple of (integer capacity, volume capacity, sorted
+        (name, weight, value, volume, quantity) tuples)
+    """
+    weights, cap = integer_weights(items, capacity, resolution)
+    entries = []
+    for item, weight in zip(items, weights):
+        quantity = int(item.get('quantity', 1))
+        volume = float(item.get('volume', 0)) if volume_capacity is not None else 0.0
+        if weight > 0:
+            quantity = min(quantity, cap // weight)
+        if volume > 0:
+            quantity = min(quantity, int(volume_capacity // volume))
+        entries.append((item['name'], weight, item['value'], volume, quantity))
+    return cap, volume_capacity, tuple(sorted(entries))
+
+def knapsack_mode(n: int, capacity: int, memory_budget: int = KNAPSACK_MEMORY_BUDGET) -> str:
+    """
+    Pick the cheapest knapsack table layout that fits the memory budget
+    
+    Args:
+        n: Number of items
+        capacity: Integer capacity of the table
+        memory_budget: Bytes available for the decision table
+        
+    Returns:
+        "dense" (one byte per cell), "packed" (one bit per cell) or "divide"
+        (divide and conquer, O(capacity) memory per recursion level)
+    """
+    width = capacity + 1
+    if (n + 1) * width <= memory_budget:
+        return "dense"
+    if (n + 1) * ((width + 7) // 8) <= memory_budget:
+        return "packed"
+    return "divide"
+
+def choose_solver(n: int, capacity: int) -> str:
+    """
+    Pick the knapsack solver expected to be fastest
+    
+    The DP costs O(n * capacity) whatever the items look like, so it is
+    used while the table stays small. Past that the cost of the search
+    solvers depends on the items instead of the capacity: meet in the
+    middle is O(2 ** (n / 2) * n) for few items, and branch and bound
+    handles the rest.
+    
+    Args:
+        n: Number of items
+        capacity: Integer capacity
+        
+    Returns:
+        "dp", "meet_in_middle" or "branch_and_bound"
+    """
+    if n * (capacity + 1) <= DP_MAX_CELLS:
+        return "dp"
+    if n <= MEET_IN_MIDDLE_MAX_ITEMS:
+        return "meet_in_middle"
+    return "branch_and_bound"
+
+def knapsack(items: List[Dict], capacity: float, mode: str = "auto",
+             memory_budget: int = KNAPSACK_MEMORY_BUDGET,
+             resolution: Optional[float] = None, solver: str = "auto",
+             epsilon: float = 0.1, stats: Optional[Dict] = None,
+             volume_capacity: Optional[float] = None) -> Tuple[float, List[int]]:
     """
     Solve the 0/1 knapsack problem for supply allocation
     
     Args:
         items: List of dictionaries with 'name', 'value', and 'weight' keys
         capacity: Maximum weight capacity
+        mode: "dense", "packed", "divide" or "auto" to choose from the
+            memory budget (see knapsack_mode); only used by the DP solver
+        memory_budget: Bytes available for the decision table in "auto" mode
+        resolution: Optional weight unit for fractional weights (see
+            integer_weights); None truncates weights to whole units
+        solver: "dp", "branch_and_bound", "meet_in_middle", "fptas"
+            (approximate, see approximate_knapsack) or "auto" to choose an
+            exact solver from the item count and capacity (see choose_solver)
+        epsilon: Relative error allowed by the "fptas" solver
+        stats: Optional dict that receives the 'solver' used, its 'time_ms'
+            and the 'guarantee' (value is at least this fraction of optimal)
+        volume_capacity: Optional maximum total volume; items then also
+            need a 'volume' key (default 0) and the solver is "pareto",
+            "lagrangian" or "auto" (see knapsack_2d)
         
     Returns:
         Tuple of (maximum value achievable, list of selected item indices)
     """
-    n = len(items)
-    # Create arrays for dynamic programming
-    dp = np.zeros((n + 1, int(capacity) + 1), dtype=float)
-    keep = np.zeros((n + 1, int(capacity) + 1), dtype=bool)
+    weights, cap = integer_weights(items, capacity, resolution)
+    values = [item['value'] for item in items]
+    volumes = None
+    if volume_capacity is not None:
+        volumes = [float(item.get('volume', 0)) for item in items]
+    return _dispatch(weights, values, cap, solver, mode, memory_budget,
+                     epsilon=epsilon, stats=stats, volumes=volumes,
+                     volume_capacity=volume_capacity)
+
+def knapsack_2d(items: List[Dict], capacity: float, volume_capacity: float,
+                resolution: Optional[float] = None, solver: str = "auto",
+                stats: Optional[Dict] = None) -> Tuple[float, List[int]]:
+    """
+    Solve the 0/1 knapsack problem with both a weight and a volume limit
+    
+    A table over both capacities would hold (n + 1) x (C + 1) x (V + 1)
+    cells. Instead "pareto" keeps only the loads no other load beats on
+    weight, volume and value at once, which is exact and usually a small
+    set. "lagrangian" moves the volume limit into the objective with a
+    multiplier tuned by subgradient steps, solving one weight-only
+    knapsack per step; it returns the best feasible load found and proves
+    how close it is. "auto" runs the Pareto DP for up to PARETO_MAX_ITEMS
+    items and hands over to the Lagrangian solver for more items or if the
+    state set outgrows PARETO_MAX_STATES.
+    
+    Args:
+        items: List of dictionaries with 'name', 'value', 'weight' and 'volume' keys
+        capacity: Maximum weight capacity
+        volume_capacity: Maximum total volume
+        resolution: Optional weight unit for fractional weights (see integer_weights)
+        solver: "pareto", "lagrangian" or "auto"
+        stats: Optional dict filled as in knapsack(); 'guarantee' is 1.0
+            for the Pareto DP
+        
+    Returns:
+        Tuple of (value achieved, list of selected item indices)
+    """
+    return knapsack(items, capacity, resolution=resolution, solver=solver, stats=stats,
+                    volume_capacity=volume_capacity)
+
+def approximate_knapsack(items: List[Dict], capacity: float, epsilon: float = 0.1,
+                         resolution: Optional[float] = None) -> Tuple[float, List[int], float]:
+    """
+    Solve the 0/1 knapsack problem to within a factor (1 - epsilon) of optimal
+    
+    Uses the value-scaling FPTAS: values are divided by
+    K = epsilon * max value / n and rounded down, and a DP over scaled
+    value finds the lightest load reaching each value. Its runtime is
+    O(n^3 / epsilon) whatever the capacity, which makes it the fast choice
+    for large capacities and many re-plans.
+    
+    Args:
+        items: List of dictionaries with 'name', 'value', and 'weight' keys
+        capacity: Maximum weight capacity
+        epsilon: Allowed relative error, between 0 and 1
+        resolution: Optional weight unit for fractional weights (see integer_weights)
+        
+    Returns:
+        Tuple of (value achieved, list of selected item indices, guarantee),
+        where the value is proven to be at least guarantee times the optimum
+        (guarantee >= 1 - epsilon, often much closer to 1)
+    """
+    stats = {}
+    value, selected = knapsack(items, capacity, resolution=resolution, solver="fptas",
+                               epsilon=epsilon, stats=stats)
+    return value, selected, stats['guarantee']
+
+def _dispatch(weights: List[int], values: List[float], cap: int, solver: str, mode: str,
+              memory_budget: int, verbose: bool = True, epsilon: float = 0.1,
+              stats: Optional[Dict] = None, volumes: Optional[List[float]] = None,
+              volume_capacity: Optional[float] = None,
+              deadline: Optional[float] = None) -> Tuple[float, List[int]]:
+    if volumes is not None and solver not in ("auto", "pareto", "lagrangian"):
+        raise ValueError(f"Knapsack solver '{solver}' does not handle volume limits")
+    if solver == "auto" and volumes is None:
+        solver = choose_solver(len(weights), cap)
+    start = time.perf_counter()
+    guarantee = 1.0
+    if volumes is not None:
+        value, selected, guarantee, solver = _knapsack_2d(weights, volumes, values, cap,
+                                                          volume_capacity, solver, memory_budget)
+        result = (value, selected)
+    elif solver == "dp":
+        result = _solve(weights, values, cap, mode, memory_budget)
+    elif solver == "branch_and_bound":
+        result = _knapsack_branch_and_bound(weights, values, cap, deadline)
+    elif solver == "meet_in_middle":
+        result = _knapsack_meet_in_middle(weights, values, cap)
+    elif solver == "fptas":
+        value, selected, guarantee = _knapsack_fptas(weights, values, cap, epsilon)
+        result = (value, selected)
+    else:
+        raise ValueError(f"Unknown knapsack solver '{solver}'")
+    elapsed = (time.perf_counter() - start) * 1000
+    if stats is not None:
+        stats['solver'] = solver
+        stats['time_ms'] = elapsed
+        stats['guarantee'] = guarantee
+    if verbose:
+        quality = f", at least {guarantee:.1%} of optimal" if guarantee < 1.0 else ""
+        volume = f", volume {volume_capacity:g}" if volumes is not None else ""
+        print(f"🧮 Knapsack solver: {solver} ({len(weights)} items, capacity {cap}{volume}) "
+              f"in {elapsed:.1f} ms{quality}")
+    return result
+
+def _solve(weights: List[int], values: List[float], cap: int, mode: str,
+           memory_budget: int) -> Tuple[float, List[int]]:
+    n = len(weights)
+    if mode == "auto":
+        mode = knapsack_mode(n, cap, memory_budget)
+    if mode == "divide":
+        return _knapsack_divide(weights, values, cap, memory_budget)
+    if mode not in ("dense", "packed"):
+        raise ValueError(f"Unknown knapsack mode '{mode}'")
+
+    packed = mode == "packed"
+    # Best value per capacity for the items seen so far, updated one item at a time
+    row = np.zeros(cap + 1, dtype=float)
+    if packed:
+        # Decision bit for capacity w of item i: keep[i][w >> 3] & (128 >> (w & 7))
+        keep = np.zeros((n + 1, (cap + 8) // 8), dtype=np.uint8)
+        take_row = np.zeros(cap + 1, dtype=bool)
+    else:
+        keep = np.zeros((n + 1, cap + 1), dtype=bool)
     
-    # Fill the dynamic programming table
+    # Each item updates the whole row at once: capacities w >= weight compare
+    # skipping the item (row[w]) with taking it (row[w - weight] + value)
     for i in range(1, n + 1):
-        for w in range(int(capacity) + 1):
-            item_weight = int(items[i-1]['weight'])
-            item_value = items[i-1]['value']
-            
-            if item_weight <= w:
-                value_with_item = dp[i-1][w-item_weight] + item_value
-                if value_with_item > dp[i-1][w]:
-                    dp[i][w] = value_with_item
-                    keep[i][w] = True
-                else:
-                    dp[i][w] = dp[i-1][w]
-            else:
-                dp[i][w] = dp[i-1][w]
+        item_weight = weights[i-1]
+        item_value = values[i-1]
+        if item_weight > cap:
+            continue
+        
+        value_with_item = row[:cap + 1 - item_weight] + item_value
+        take = value_with_item > row[item_weight:]
+        if packed:
+            take_row[:item_weight] = False
+            take_row[item_weight:] = take
+            keep[i] = np.packbits(take_row)
+        else:
+            keep[i, item_weight:] = take
+        row[item_weight:] = np.where(take, value_with_item, row[item_weight:])
     
     # Backtrack to find selected items
     selected = []
-    w = int(capacity)
+    w = cap
     for i in range(n, 0, -1):
-        if keep[i][w]:
+        kept = keep[i][w >> 3] & (128 >> (w & 7)) if packed else keep[i][w]
+        if kept:
             selected.append(i-1)
-            w -= int(items[i-1]['weight'])
+            w -= weights[i-1]
     
-    return dp[n][int(capacity)], selected
+    return row[cap], selected
+
+def _value_row(weights: List[int], values: List[float], capacity: int,
+               deadline: Optional[float] = None) -> Optional[np.ndarray]:
+    """Best value for every capacity 0..capacity, keeping no decisions (None past the deadline)."""
+    row = np.zeros(capacity + 1, dtype=float)
+    for item_weight, item_value in zip(weights, values):
+        if deadline is not None and time.perf_counter() > deadline:
+            return None
+        if item_weight > capacity:
+            continue
+        np.maximum(row[item_weight:], row[:capacity + 1 - item_weight] + item_value,
+                   out=row[item_weight:])
+    return row
 
-def multi_knapsack(items: List[Dict], vehicles: List[Dict]) -> List[Tuple[int, List[int]]]:
+def _knapsack_divide(weights: List[int], values: List[float], capacity: int,
+                     memory_budget: int) -> Tuple[float, List[int]]:
     """
-    Solve multiple knapsack problems for multiple vehicles
+    Divide and conquer knapsack for tables too large even when bit-packed.
+    
+    The items are split in half and the value rows of both halves are
+    combined to find how much capacity the first half uses in an optimal
+    solution; each half is then solved on its own share. Only value rows
+    are kept, so memory stays O(capacity) per recursion level, at roughly
+    twice the work of the table based modes. Subproblems are handed to the
+    table based solver as soon as they fit the memory budget.
+    
+    The value matches the other modes; among equally valuable selections a
+    different one may be returned.
+    """
+    selected = []
+
+    def solve(indices: List[int], cap: int):
+        if not indices:
+            return
+        sub_weights = [weights[i] for i in indices]
+        sub_values = [values[i] for i in indices]
+        mode = knapsack_mode(len(indices), cap, memory_budget)
+        if mode != "divide" or len(indices) == 1:
+            _, chosen = _solve(sub_weights, sub_values, cap,
+                               mode if mode != "divide" else "packed", memory_budget)
+            selected.extend(indices[j] for j in chosen)
+            return
+        mid = len(indices) // 2
+        first = _value_row(sub_weights[:mid], sub_values[:mid], cap)
+        second = _value_row(sub_weights[mid:], sub_values[mid:], cap)
+        # Capacity c for the left half leaves cap - c for the right half
+        split = int(np.argmax(first + second[::-1]))
+        solve(indices[:mid], split)
+        solve(indices[mid:], cap - split)
+
+    solve(list(range(len(weights))), capacity)
+    return _value_row(weights, values, capacity)[capacity], sorted(selected, reverse=True)
+
+def _dantzig_bound(weights: List[int], values: List[float], capacity: int) -> float:
+    """LP relaxation bound: greedy by value density, last item taken fractionally."""
+    bound = 0.0
+    room = capacity
+    order = sorted((i for i in range(len(weights)) if values[i] > 0),
+                   key=lambda i: values[i] / weights[i] if weights[i] else float('inf'),
+                   reverse=True)
+    for i in order:
+        if weights[i] <= room:
+            room -= weights[i]
+            bound += values[i]
+        else:
+            bound += values[i] * room / weights[i]
+            break
+    return bound
+
+def _knapsack_fptas(weights: List[int], values: List[float], capacity: int,
+                    epsilon: float) -> Tuple[float, List[int], float]:
+    """
+    Value-scaling FPTAS with an a posteriori guarantee.
+    
+    With profits floor(value / K) for K = epsilon * max value / n, the
+    table has one column per scaled profit (at most n^2 / epsilon of
+    them) and holds the minimum weight reaching that profit, so capacity
+    never enters the running time. Rounding loses less than K per item,
+    hence optimum <= value + n * K; together with the Dantzig bound this
+    gives the guarantee reported for the load actually found.
+    """
+    if not 0 < epsilon < 1:
+        raise ValueError("epsilon must be between 0 and 1")
+    candidates = [i for i in range(len(weights)) if weights[i] <= capacity and values[i] > 0]
+    if not candidates:
+        return 0.0, [], 1.0
+    scale = epsilon * max(values[i] for i in candidates) / len(candidates)
+    profits = [int(values[i] / scale) for i in candidates]
+    upper = _dantzig_bound([weights[i] for i in candidates], [values[i] for i in candidates],
+                           capacity)
+    # No load can reach a scaled profit above the (scaled) LP bound
+    total = min(sum(profits), int(upper / scale) + 1)
+
+    # Lightest weight reaching each scaled profit, one item at a time
+    lightest = np.full(total + 1, np.inf)
+    lightest[0] = 0.0
+    keep = np.zeros((len(candidates), (total + 8) // 8), dtype=np.uint8)
+    take_row = np.zeros(total + 1, dtype=bool)
+    for k, (i, profit) in enumerate(zip(candidates, profits)):
+        if profit == 0 or profit > total:
+            continue
+        with_item = lightest[:total + 1 - profit] + weights[i]
+        take = with_item < lightest[profit:]
+        take_row[:profit] = False
+        take_row[profit:] = take
+        keep[k] = np.packbits(take_row)
+        lightest[profit:] = np.where(take, with_item, lightest[profit:])
+
+    p = int(np.flatnonzero(lightest <= capacity)[-1])
+    selected = []
+    for k in range(len(candidates) - 1, -1, -1):
+        if keep[k][p >> 3] & (128 >> (p & 7)):
+            selected.append(candidates[k])
+            p -= profits[k]
+
+    value = float(sum(values[i] for i in selected))
+    bound = min(upper, value + len(candidates) * scale)
+    return value, sorted(selected, reverse=True), value / bound if bound > 0 else 1.0
+
+def _knapsack_2d(weights: List[int], volumes: List[float], values: List[float], capacity: int,
+                 volume_capacity: float, solver: str,
+                 memory_budget: int) -> Tuple[float, List[int], float, str]:
+    """Weight + volume knapsack; returns (value, selected, guarantee, solver used)."""
+    candidates = [i for i in range(len(weights))
+                  if weights[i] <= capacity and volumes[i] <= volume_capacity and values[i] > 0]
+    if solver == "auto" and len(candidates) > PARETO_MAX_ITEMS:
+        solver = "lagrangian"
+    if solver in ("auto", "pareto"):
+        limit = PARETO_MAX_STATES if solver == "auto" else None
+        found = _knapsack_pareto(weights, volumes, values, capacity, volume_capacity,
+                                 candidates, limit)
+        if found is not None:
+            return found[0], found[1], 1.0, "pareto"
+    value, selected, guarantee = _knapsack_lagrangian(weights, volumes, values, capacity,
+                                                      volume_capacity, candidates, memory_budget)
+    return value, selected, guarantee, "lagrangian"
+
+def _pareto_front(states: List[Tuple]) -> List[Tuple]:
+    """
+    Drop every (weight, volume, value, taken) state that another state
+    matches or beats on all three, since its extensions are beaten too.
+    """
+    states.sort(key=lambda state: (-state[2], state[0], state[1]))
+    # Staircase of the kept (weight, volume) pairs: weight ascending, volume descending
+    stair_w, stair_v = [], []
+    front = []
+    for state in states:
+        weight, volume = state[0], state[1]
+        k = bisect_right(stair_w, weight) - 1
+        if k >= 0 and stair_v[k] <= volume:
+            continue  # A kept state of at least this value is no heavier and no bulkier
+        front.append(state)
+        start = k if k >= 0 and stair_w[k] == weight else k + 1
+        end = k + 1
+        while end < len(stair_w) and stair_v[end] >= volume:
+            end += 1
+        stair_w[start:end] = [weight]
+        stair_v[start:end] = [volume]
+    return front
+
+def _knapsack_pareto(weights: List[int], volumes: List[float], values: List[float],
+                     capacity: int, volume_capacity: float, candidates: List[int],
+                     max_states: Optional[int]) -> Optional[Tuple[float, List[int]]]:
+    """
+    Exact weight + volume knapsack over Pareto-optimal partial loads.
+    
+    Items are added in value density order so that, besides dominance,
+    states whose value plus the weight-only LP bound of the items still to
+    come cannot beat the best load seen so far are dropped as well.
+    Returns None once more than max_states states survive pruning.
+    """
+    order, bound = _suffix_bounds(weights, values, candidates)
+    # (weight, volume, value, taken items as a linked list)
+    states = [(0, 0.0, 0.0, None)]
+    best = 0.0
+    for k, i in enumerate(order):
+        weight, volume, value = weights[i], volumes[i], values[i]
+        grown = [(w + weight, v + volume, total + value, (i, taken))
+                 for w, v, total, taken in states
+                 if w + weight <= capacity and v + volume <= volume_capacity]
+        best = max([best] + [state[2] for state in grown])
+        states = [state for state in _pareto_front(states + grown)
+                  if bound(k + 1, capacity - state[0], state[2]) >= best - 1e-9]
+        if max_states is not None and len(states) > max_states:
+            return None
+
+    _, _, best_value, taken = max(states, key=lambda state: state[2])
+    selected = []
+    while taken is not None:
+        i, taken = taken
+        selected.append(i)
+    return best_value, sorted(selected, reverse=True)
+
+def _knapsack_lagrangian(weights: List[int], volumes: List[float], values: List[float],
+                         capacity: int, volume_capacity: float, candidates: List[int],
+                         memory_budget: int, iterations: int = 60) -> Tuple[float, List[int], float]:
+    """
+    Lagrangian relaxation of the volume limit with subgradient optimization.
+    
+    For a multiplier lam >= 0, the best weight-feasible load for values
+    value - lam * volume, plus lam * volume_capacity, bounds the optimum
+    from above. Each step moves lam against the volume slack of that load
+    (Polyak step size), repairs the load into a volume-feasible one, and
+    keeps the best of those. Stops early when the load is provably optimal.
+    """
+    def size(i: int) -> float:
+        # Share of both capacities an item uses, for greedy repair and fill
+        return ((weights[i] / capacity if capacity else 0.0) +
+                (volumes[i] / volume_capacity if volume_capacity else 0.0))
+
+    by_density = sorted(candidates, key=lambda i: values[i] / size(i) if size(i) else float('inf'),
+                        reverse=True)
+
+    def repair(chosen: List[int]) -> Set[int]:
+        load = set(chosen)
+        volume = sum(volumes[i] for i in load)
+        # Drop the least valuable volume first until the load fits
+        for i in sorted(load, key=lambda i: values[i] / volumes[i] if volumes[i] else float('inf')):
+            if volume <= volume_capacity:
+                break
+            load.discard(i)
+            volume -= volumes[i]
+        weight = sum(weights[i] for i in load)
+        for i in by_density:
+            if i not in load and weight + weights[i] <= capacity and volume + volumes[i] <= volume_capacity:
+                load.add(i)
+                weight += weights[i]
+                volume += volumes[i]
+        return load
+
+    best_value, best_load = 0.0, set()
+    upper = sum(values[i] for i in candidates)
+    lam, step_scale, stalled = 0.0, 2.0, 0
+    for _ in range(iterations):
+        pool = [i for i in candidates if values[i] - lam * volumes[i] > 0]
+        relaxed, chosen = _dispatch([weights[i] for i in pool],
+                                    [values[i] - lam * volumes[i] for i in pool],
+                                    capacity, "auto", "auto", memory_budget, verbose=False)
+        chosen = [pool[j] for j in chosen]
+        bound = float(relaxed) + lam * volume_capacity
+        if bound < upper - 1e-9:
+            upper, stalled = bound, 0
+        else:
+            stalled += 1
+            if stalled >= 5:
+                step_scale, stalled = step_scale / 2, 0
+
+        load = repair(chosen)
+        value = sum(values[i] for i in load)
+        if value > best_value:
+            best_value, best_load = value, load
+
+        slack = volume_capacity - sum(volumes[i] for i in chosen)
+        if slack >= 0 and lam * slack <= 1e-9:
+            # The relaxed load fits and meets complementary slackness, so it is optimal
+            upper = best_value
+            break
+        if upper - best_value <= 1e-9 * max(1.0, upper):
+            break
+        # Subgradient step: too much volume raises the multiplier, spare volume lowers it
+        lam = max(0.0, lam - step_scale * (upper - best_value) / slack)
+
+    guarantee = min(1.0, best_value / upper) if upper > 0 else 1.0
+    return float(best_value), sorted(best_load, reverse=True), guarantee
+
+def _suffix_bounds(weights: List[int], values: List[float], indices: List[int]):
+    """
+    Sort items by value density for Dantzig bounds over their suffixes.
+    
+    Returns (order, bound) where bound(k, room, value) is value plus the LP
+    bound of the items order[k:] in room weight: the items are packed by
+    density and the first one that does not fit is taken fractionally.
+    Prefix sums find that item with one binary search.
+    """
+    order = sorted(indices, key=lambda i: values[i] / weights[i] if weights[i] else float('inf'),
+                   reverse=True)
+    w = [weights[i] for i in order]
+    v = [values[i] for i in order]
+    prefix_w, prefix_v = [0], [0.0]
+    for item_weight, item_value in zip(w, v):
+        prefix_w.append(prefix_w[-1] + item_weight)
+        prefix_v.append(prefix_v[-1] + item_value)
+
+    def bound(k: int, room: int, value: float) -> float:
+        # Items k..j-1 fit whole; item j (if any) fills the rest fractionally
+        j = bisect_right(prefix_w, prefix_w[k] + room, k) - 1
+        value += prefix_v[j] - prefix_v[k]
+        if j < len(order):
+            value += v[j] * (room - (prefix_w[j] - prefix_w[k])) / w[j]
+        return value
+
+    return order, bound
+
+def _knapsack_branch_and_bound(weights: List[int], values: List[float], capacity: int,
+                               deadline: Optional[float] = None) -> Tuple[float, List[int]]:
+    """
+    Depth-first branch and bound over the items sorted by value density.
+    
+    Each branch is bounded by the Dantzig relaxation of the remaining
+    items (see _suffix_bounds), and a greedy packing seeds the incumbent
+    so weak branches are cut from the start. The work depends on the items,
+    not on the capacity. Past the optional deadline (a time.perf_counter()
+    value) the best load found so far is returned, no longer proven optimal.
+    """
+    order, bound = _suffix_bounds(
+        weights, values, [i for i in range(len(weights)) if weights[i] <= capacity and values[i] > 0])
+    w = [weights[i] for i in order]
+    v = [values[i] for i in order]
+    m = len(order)
+
+    # Greedy by density is a feasible first incumbent
+    best_value, best_taken, room = 0.0, None, capacity
+    for k in range(m):
+        if w[k] <= room:
+            room -= w[k]
+            best_value += v[k]
+            best_taken = (k, best_taken)
+
+    # Stack of (next item, weight used, value, taken items as a linked list)
+    stack = [(0, 0, 0.0, None)]
+    steps = 0
+    while stack:
+        steps += 1
+        if deadline is not None and steps % 1024 == 0 and time.perf_counter() > deadline:
+            break
+        k, used, value, taken = stack.pop()
+        if value > best_value:
+            best_value, best_taken = value, taken
+        if k == m or bound(k, capacity - used, value) <= best_value:
+            continue
+        stack.append((k + 1, used, value, taken))
+        if used + w[k] <= capacity:
+            # Pushed last so the branch taking the item is explored first
+            stack.append((k + 1, used + w[k], value + v[k], (k, taken)))
+
+    selected = []
+    while best_taken is not None:
+        k, best_taken = best_taken
+        selected.append(order[k])
+    return best_value, sorted(selected, reverse=True)
+
+def _knapsack_meet_in_middle(weights: List[int], values: List[float],
+                             capacity: int) -> Tuple[float, List[int]]:
+    """
+    Meet in the middle (Horowitz-Sahni) knapsack for few items.
+    
+    Every subset of each half of the items is enumerated as (weight,
+    value) arrays. The second half is sorted by weight with a running
+    best value, so the best partner for each subset of the first half is
+    one binary search away. O(2 ** (n / 2) * n) time and memory.
+    """
+    indices = [i for i in range(len(weights)) if weights[i] <= capacity]
+    mid = len(indices) // 2
+
+    def subsets(part: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        # Bit b of a subset's position says whether part[b] is in it
+        sub_w = np.zeros(1, dtype=np.int64)
+        sub_v = np.zeros(1, dtype=float)
+        for i in part:
+            sub_w = np.concatenate((sub_w, sub_w + weights[i]))
+            sub_v = np.concatenate((sub_v, sub_v + values[i]))
+        return sub_w, sub_v
+
+    first_w, first_v = subsets(indices[:mid])
+    second_w, second_v = subsets(indices[mid:])
+
+    by_weight = np.argsort(second_w, kind='stable')
+    sorted_w = second_w[by_weight]
+    sorted_v = second_v[by_weight]
+    best_v = np.maximum.accumulate(sorted_v)
+    # Position of the latest subset reaching each running best
+    best_at = np.maximum.accumulate(np.where(sorted_v == best_v, np.arange(len(sorted_v)), 0))
+
+    fits = first_w <= capacity
+    partner = np.searchsorted(sorted_w, capacity - first_w, side='right') - 1
+    totals = np.where(fits, first_v + best_v[np.maximum(partner, 0)], -np.inf)
+    first_mask = int(np.argmax(totals))
+    second_mask = int(by_weight[best_at[partner[first_mask]]])
+
+    selected = [indices[b] for b in range(mid) if first_mask >> b & 1]
+    selected += [indices[mid + b] for b in range(len(indices) - mid) if second_mask >> b & 1]
+    return float(totals[first_mask]), sorted(selected, reverse=True)
+
+def bounded_knapsack(items: List[Dict], capacity: float, mode: str = "auto",
+                     memory_budget: int = KNAPSACK_MEMORY_BUDGET,
+                     resolution: Optional[float] = None, solver: str = "auto",
+                     epsilon: float = 0.1, stats: Optional[Dict] = None,
+                     volume_capacity: Optional[float] = None) -> Tuple[float, List[int]]:
+    """
+    Solve the bounded knapsack problem: item i may be loaded up to its
+    'quantity' times (default 1)
+    
+    Each item's units are split into chunks of 1, 2, 4, ... units plus a
+    remainder, and each chunk becomes one 0/1 item. Every count up to the
+    quantity is a sum of distinct chunks, so the 0/1 solution over the
+    chunks is optimal, at O(capacity * log(quantity)) work per item instead
+    of O(capacity * quantity) for one item per unit.
+    
+    Args:
+        items: List of dictionaries with 'name', 'value', 'weight' and an
+            optional integer 'quantity' key
+        capacity: Maximum weight capacity
+        mode: Table layout, see knapsack()
+        memory_budget: Bytes available for the decision table in "auto" mode
+        resolution: Optional weight unit for fractional weights (see integer_weights)
+        solver: Solver for the chunk items, see knapsack()
+        epsilon: Relative error allowed by the "fptas" solver
+        stats: Optional dict filled as in knapsack()
+        volume_capacity: Optional maximum total volume (see knapsack_2d)
+        
+    Returns:
+        Tuple of (maximum value achievable, number of units selected per item)
+    """
+    weights, cap = integer_weights(items, capacity, resolution)
+    chunk_weights, chunk_values, chunk_volumes, owners, sizes = [], [], [], [], []
+    for i, (item, weight) in enumerate(zip(items, weights)):
+        quantity = int(item.get('quantity', 1))
+        volume = float(item.get('volume', 0)) if volume_capacity is not None else 0.0
+        # More units could never fit
+        if weight > 0:
+            quantity = min(quantity, cap // weight)
+        if volume > 0:
+            quantity = min(quantity, int(volume_capacity // volume))
+        size = 1
+        while quantity > 0:
+            take = min(size, quantity)
+            chunk_weights.append(weight * take)
+            chunk_values.append(item['value'] * take)
+            chunk_volumes.append(volume * take)
+            owners.append(i)
+            sizes.append(take)
+            quantity -= take
+            size *= 2
+
+    value, selected = _dispatch(chunk_weights, chunk_values, cap, solver, mode, memory_budget,
+                                epsilon=epsilon, stats=stats,
+                                volumes=chunk_volumes if volume_capacity is not None else None,
+                                volume_capacity=volume_capacity)
+    counts = [0] * len(items)
+    for chunk in selected:
+        counts[owners[chunk]] += sizes[chunk]
+    return value, counts
+
+def solve_multi_knapsack(items: List[Dict], vehicles: List[Dict], time_budget: float = 1.0,
+                         resolution: Optional[float] = None,
+                         memory_budget: int = KNAPSACK_MEMORY_BUDGET) -> Dict:
+    """
+    Load a fleet of vehicles so the total value carried is maximal
+    
+    Each item goes on at most one vehicle. The solver:
+    
+    1. Bounds the optimum from above with the surrogate relaxation that
+       pools every vehicle into one knapsack of the summed capacity. Its
+       LP relaxation is always used; the pooled knapsack is also solved
+       exactly when its value row fits DP_MAX_CELLS and the memory budget
+       and finishes within half the time budget.
+    2. Builds a first assignment by filling the vehicles one at a time,
+       smallest first, with an exact single knapsack over the items left
+       (greedily by value density once the time budget is spent).
+    3. Improves it by local search until the time budget runs out or the
+       bound is reached: for each pair of vehicles, their items and the
+       unassigned ones are repacked with exact single knapsacks, and the
+       result is kept if it carries more value.
+    
+    Single knapsacks solved by branch and bound stop at the end of the time
+    budget with the best load found so far, so no step overruns it by more
+    than one table DP.
+    
+    Loads, item owners and unassigned items are kept in indexed sets, so
+    every move costs time proportional to the vehicles it touches rather
+    than to the whole fleet.
     
     Args:
         items: List of dictionaries with 'name', 'value', and 'weight' keys
         vehicles: List of dictionaries with 'id' and 'capacity' keys
+        time_budget: Wall-clock seconds after which the solver stops
+            improving and returns the best assignment found
+        resolution: Optional weight unit for fractional weights (see integer_weights)
+        memory_budget: Bytes available for each single knapsack table
         
     Returns:
-        List of tuples (vehicle_id, list of assigned item indices)
+        dict: 'assignments' (list of (vehicle_id, item indices) for vehicles
+              carrying anything), 'value', 'upper_bound' and 'gap' (relative
+              distance of value from the bound, 0.0 when proven optimal)
+    """
+    start = time.perf_counter()
+    weights, caps = integer_weights(items, [v['capacity'] for v in vehicles], resolution)
+    values = [item['value'] for item in items]
+    largest = max(caps, default=-1)
+    candidates = [i for i in range(len(items)) if weights[i] <= largest and values[i] > 0]
+
+    # Surrogate relaxation: one knapsack holding the whole fleet's capacity
+    pooled = [weights[i] for i in candidates]
+    pooled_values = [values[i] for i in candidates]
+    total = sum(caps)
+    upper = _dantzig_bound(pooled, pooled_values, total)
+    if (candidates and caps and len(pooled) * (total + 1) <= DP_MAX_CELLS
+            and 8 * (total + 1) <= memory_budget):
+        row = _value_row(pooled, pooled_values, total, deadline=start + time_budget / 2)
+        if row is not None:
+            upper = min(upper, float(row[total]))
+
+    loads = [set() for _ in vehicles]
+    unassigned = set(candidates)
+
+    def pack(v: int, pool: Set[int]) -> Tuple[float, Set[int]]:
+        # Best subset of pool for vehicle v on its own
+        pool = [i for i in pool if weights[i] <= caps[v]]
+        value, chosen = _dispatch([weights[i] for i in pool], [values[i] for i in pool],
+                                  caps[v], "auto", "auto", memory_budget, verbose=False,
+                                  deadline=start + time_budget)
+        return value, {pool[j] for j in chosen}
+
+    density = sorted(candidates, key=lambda i: values[i] / weights[i] if weights[i] else float('inf'),
+                     reverse=True)
+    for v in sorted(range(len(vehicles)), key=lambda v: caps[v]):
+        if time.perf_counter() - start < time_budget:
+            _, chosen = pack(v, unassigned)
+        else:
+            # Out of time: fill the remaining vehicles greedily by value density
+            chosen, room = set(), caps[v]
+            for i in density:
+                if i in unassigned and weights[i] <= room:
+                    chosen.add(i)
+                    room -= weights[i]
+        loads[v] = chosen
+        unassigned -= chosen
+
+    def load_value(v: int) -> float:
+        return sum(values[i] for i in loads[v])
+
+    best = sum(load_value(v) for v in range(len(vehicles)))
+    pairs = list(combinations(range(len(vehicles)), 2))
+    improved = True
+    while improved and best < upper - 1e-9 and time.perf_counter() - start < time_budget:
+        improved = False
+        for a, b in pairs:
+            if time.perf_counter() - start >= time_budget:
+                break
+            pool = loads[a] | loads[b] | {i for i in unassigned if weights[i] <= max(caps[a], caps[b])}
+            current = load_value(a) + load_value(b)
+            for first, second in ((a, b), (b, a)):
+                first_value, first_load = pack(first, pool)
+                second_value, second_load = pack(second, pool - first_load)
+                if first_value + second_value > current + 1e-9:
+                    unassigned |= loads[a] | loads[b]
+                    loads[first] = first_load
+                    loads[second] = second_load
+                    unassigned -= first_load | second_load
+                    best += first_value + second_value - current
+                    improved = True
+                    break
+
+    best = sum(load_value(v) for v in range(len(vehicles)))
+    gap = (upper - best) / upper if upper > 0 else 0.0
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"🚚 Fleet loading: {len(items)} items on {len(vehicles)} vehicles, "
+          f"value {best:g} (gap {gap:.2%}) in {elapsed:.1f} ms")
+    return {
+        "assignments": [(vehicle['id'], sorted(loads[v]))
+                        for v, vehicle in enumerate(vehicles) if loads[v]],
+        "value": best,
+        "upper_bound": upper,
+        "gap": max(gap, 0.0)
+    }
+
+def _solve_load(problem: Tuple[List[Dict], float, Optional[float]],
+                options: Dict) -> Tuple[float, List[int], float]:
+    items, capacity, volume_capacity = problem
+    stats = {}
+    value, counts = bounded_knapsack(items, capacity, stats=stats,
+                                     volume_capacity=volume_capacity, **options)
+    return float(value), counts, stats['guarantee']
+
+def load_work(problems: List[Tuple[List[Dict], float, Optional[float]]],
+              resolution: Optional[float] = None) -> int:
     """
-    assignments = []
-    remaining_items = items.copy()
+    Estimate the work of solving load planning problems as DP table cells
     
-    for vehicle in vehicles:
-        if not remaining_items:
-            break
-            
-        value, selected = knapsack(remaining_items, vehicle['capacity'])
-        if selected:
-            assignments.append((vehicle['id'], selected))
-            # Remove selected items from remaining items
-            remaining_items = [item for i, item in enumerate(remaining_items) 
-                             if i not in selected]
+    Args:
+        problems: List of (items, capacity, volume_capacity) tuples as taken by solve_loads()
+        resolution: Optional weight unit for fractional weights (see integer_weights)
+        
+    Returns:
+        Binary-split chunk items x integer capacity, summed over the problems
+    """
+    work = 0
+    for items, capacity, _ in problems:
+        _, cap = integer_weights(items, capacity, resolution)
+        # A quantity of q units splits into q.bit_length() chunks (see bounded_knapsack)
+        chunks = sum(int(item.get('quantity', 1)).bit_length() for item in items)
+        work += chunks * (cap + 1)
+    return work
+
+def solve_loads(problems: List[Tuple[List[Dict], float, Optional[float]]],
+                max_workers: Optional[int] = None,
+                pool: Optional[Callable[[], Executor]] = None,
+                **options) -> List[Tuple[float, List[int], float]]:
+    """
+    Solve independent load planning problems, in a process pool when there is enough work
     
-    return assignments
+    Args:
+        problems: List of (items, capacity, volume_capacity) tuples, each a
+            bounded_knapsack() instance (volume_capacity may be None)
+        max_workers: Optional process pool size (None uses every core);
+            1 solves in this process
+        pool: Optional callable returning an executor to reuse, called only
+            when the work is worth sending out; without it a pool is started
+            and shut down for this call
+        **options: Keyword arguments passed to every bounded_knapsack() call
+            (mode, memory_budget, resolution, solver, epsilon)
+        
+    Returns:
+        List of (value, units selected per item, guarantee) in problem order
+    """
+    solve = partial(_solve_load, options=options)
+    if (max_workers == 1 or len(problems) < 2
+            or load_work(problems, options.get('resolution')) < MIN_PARALLEL_WORK):
+        return [solve(problem) for problem in problems]
+    # map() yields results in submission order, whichever worker finishes first
+    chunksize = max(1, len(problems) // 64)
+    if pool is not None:
+        return list(pool().map(solve, problems, chunksize=chunksize))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(solve, problems, chunksize=chunksize))
+
+def multi_knapsack(items: List[Dict], vehicles: List[Dict],
+                   time_budget: float = 1.0) -> List[Tuple[int, List[int]]]:
+    """
+    Solve multiple knapsack problems for multiple vehicles
+    
+    Args:
+        items: List of dictionaries with 'name', 'value', and 'weight' keys
+        vehicles: List of dictionaries with 'id' and 'capacity' keys
+        time_budget: Seconds allowed for improving the loads (see solve_multi_knapsack)
+        
+    Returns:
+        List of tuples (vehicle_id, list of assigned item indices into items)
+    """
+    return solve_multi_knapsack(items, vehicles, time_budget)["assignments"]
 
 def prioritize_supplies(demands: Dict[str, List[str]], supplies: List[Dict]) -> List[Dict]:
     """
@@ -92,7 +986,9 @@ def prioritize_supplies(demands: Dict[str, List[str]], supplies: List[Dict]) ->
                  key=lambda x: (demand_counts.get(x['name'], 0), x['value']/x['weight']),
                  reverse=True)
 
-def optimize_load(items: List[Dict], capacity: float, priorities: Dict[str, int]) -> Tuple[float, List[int]]:
+def optimize_load(items: List[Dict], capacity: float, priorities: Dict[str, int],
+                  epsilon: Optional[float] = None,
+                  stats: Optional[Dict] = None) -> Tuple[float, List[int]]:
     """
     Optimize load considering both value and priority
     
@@ -100,6 +996,10 @@ def optimize_load(items: List[Dict], capacity: float, priorities: Dict[str, int]
         items: List of dictionaries with 'name', 'value', and 'weight' keys
         capacity: Maximum weight capacity
         priorities: Dictionary mapping item names to priority values
+        epsilon: Optional relative error; when set the load is planned with
+            the FPTAS (see approximate_knapsack) instead of an exact solver
+        stats: Optional dict filled as in knapsack(), including the
+            'guarantee' achieved
         
     Returns:
         Tuple of (total value, list of selected item indices)
@@ -114,4 +1014,6 @@ def optimize_load(items: List[Dict], capacity: float, priorities: Dict[str, int]
             'weight': item['weight']
         })
     
-    return knapsack(prioritized_items, capacity)
+    if epsilon is not None:
+        return knapsack(prioritized_items, capacity, solver="fptas", epsilon=epsilon, stats=stats)
+    return knapsack(prioritized_items, capacity, stats=stats)
@@ -0,0 +1,149 @@
+from typing import List
+import random
+import numpy as np
+from core.graph import CSRGraph
+from core.routing import shortest_path_tree
+
+def _distances_from(csr: CSRGraph, source: int) -> np.ndarray:
+    return np.array(shortest_path_tree(csr, source)[0], dtype=float)
+
+def select_farthest(csr: CSRGraph, k: int, seed: int = 0) -> List[int]:
+    """
+    Pick k landmarks by farthest-point selection.
+
+    Each new landmark is the node farthest from all landmarks chosen so far;
+    unreachable nodes count as infinitely far, so every connected component
+    gets a landmark before any component gets a second one.
+    """
+    n = csr.num_nodes
+    if n == 0:
+        return []
+    start = random.Random(seed).randrange(n)
+    # Begin from the node farthest from a random start rather than the start itself
+    nearest = _distances_from(csr, start)
+    finite = np.where(np.isfinite(nearest), nearest, -1.0)
+    landmarks = [int(np.argmax(finite))]
+    nearest = _distances_from(csr, landmarks[0])
+
+    while len(landmarks) < min(k, n):
+        candidate = np.where(np.isin(np.arange(n), landmarks), -1.0, nearest)
+        landmarks.append(int(np.argmax(candidate)))
+        nearest = np.minimum(nearest, _distances_from(csr, landmarks[-1]))
+    return landmarks
+
+def select_avoid(csr: CSRGraph, k: int, seed: int = 0) -> List[int]:
+    """
+    Pick k landmarks with the "avoid" heuristic (Goldberg & Harrelson).
+
+    From a random root, each node is weighted by how much the current
+    landmarks underestimate its distance from the root. The next landmark
+    is a leaf reached by descending the shortest path tree through the
+    heaviest subtrees that do not already contain a landmark.
+    """
+    n = csr.num_nodes
+    rng = random.Random(seed)
+    landmarks = []
+    table = np.zeros((0, n))
+
+    while len(landmarks) < min(k, n):
+        root = rng.randrange(n)
+        dist, parent = shortest_path_tree(csr, root)
+        dist = np.array(dist, dtype=float)
+        reached = np.isfinite(dist)
+
+        if len(landmarks):
+            with np.errstate(invalid='ignore'):
+                bound = np.abs(table[:, root][:, None] - table)
+            bound = np.where(np.isnan(bound), 0.0, bound).max(axis=0)
+            # Only reached nodes have a finite distance to weigh
+            weight = np.zeros(n)
+            weight[reached] = dist[reached] - np.minimum(bound[reached], dist[reached])
+        else:
+            weight = np.where(reached, dist, 0.0)
+
+        children = [[] for _ in range(n)]
+        for node, p in enumerate(parent):
+            if p != -1:
+                children[p].append(node)
+
+        # Subtree sizes, children before parents (decreasing distance)
+        size = weight.copy()
+        has_landmark = np.zeros(n, dtype=bool)
+        has_landmark[landmarks] = True
+        for node in np.argsort(-np.where(reached, dist, -1.0)):
+            if not reached[node]:
+                continue
+            p = parent[node]
+            if has_landmark[node]:
+                size[node] = 0.0
+            if p != -1:
+                has_landmark[p] |= has_landmark[node]
+                size[p] += size[node]
+
+        node = int(np.argmax(size))
+        if size[node] <= 0:
+            # Nothing left to improve from this root; fall back to an unused node
+            unused = [v for v in range(n) if v not in landmarks]
+            node = rng.choice(unused)
+        else:
+            while children[node]:
+                best = max(children[node], key=lambda c: size[c])
+                if size[best] <= 0:
+                    break
+                node = best
+
+        landmarks.append(node)
+        table = np.vstack([table, _distances_from(csr, node)])
+    return landmarks
+
+class LandmarkIndex:
+    """
+    ALT (A*, Landmarks, Triangle inequality) lower bounds.
+
+    Stores exact distances from a few landmark nodes to every node as a
+    (k, n) NumPy array. For any landmark L the triangle inequality gives
+    d(v, t) >= |d(L, t) - d(L, v)|, so the maximum over the landmarks is an
+    admissible and consistent A* heuristic regardless of how edge weights
+    relate to coordinates.
+
+    Distances are computed with no roads closed. Closing roads can only
+    lengthen shortest paths, so the bounds stay valid under any closure set
+    and only have to be recomputed when the road network itself changes.
+    """
+
+    def __init__(self, csr: CSRGraph, num_landmarks: int = 8, method: str = "farthest", seed: int = 0):
+        """
+        Args:
+            csr: Compiled CSRGraph snapshot
+            num_landmarks: Number of landmarks to select
+            method: "farthest" or "avoid" landmark selection
+            seed: Random seed for the selection
+        """
+        if method == "farthest":
+            self.landmarks = select_farthest(csr, num_landmarks, seed)
+        elif method == "avoid":
+            self.landmarks = select_avoid(csr, num_landmarks, seed)
+        else:
+            raise ValueError(f"Unknown landmark selection method '{method}'")
+
+        self.nodes = csr.nodes
+        self.index = csr.index
+        self.distances = np.array([_distances_from(csr, l) for l in self.landmarks],
+                                  dtype=float).reshape(len(self.landmarks), csr.num_nodes)
+
+    def heuristic(self, goal: int) -> np.ndarray:
+        """
+        Lower bounds on the distance from every node to goal.
+
+        Args:
+            goal: Goal node id
+
+        Returns:
+            Array of shape (n,); inf where the goal is provably unreachable
+        """
+        if not len(self.landmarks):
+            return np.zeros(len(self.nodes))
+        with np.errstate(invalid='ignore'):
+            bounds = np.abs(self.distances[:, goal][:, None] - self.distances)
+        # inf - inf (both unreachable from a landmark) carries no information
+        return np.where(np.isnan(bounds), 0.0, bounds).max(axis=0)
@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional, Tuple, Iterable
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from core.graph import CSRGraph, ClosureMask, closure_bits
+from core.routing import shortest_path_tree
+
+# Below this many sources the process start-up costs more than it saves
+MIN_PARALLEL_SOURCES = 16
+
+# Per-process graph, installed once by the pool initializer
+_worker_csr = None
+_worker_closures = None
+
+def _init_worker(csr: CSRGraph, bits: bytes):
+    global _worker_csr, _worker_closures
+    _worker_csr = csr
+    _worker_closures = ClosureMask(csr, bits)
+
+def _distance_row(task: Tuple[int, List[int]]) -> List[float]:
+    source, targets = task
+    return _row(_worker_csr, source, targets, _worker_closures)
+
+def _row(csr: CSRGraph, source: int, targets: List[int],
+         closures: Optional[ClosureMask]) -> List[float]:
+    # The search stops once every target is settled, so their distances are final
+    distances, _ = shortest_path_tree(csr, source, set(targets), closures)
+    return [distances[t] for t in targets]
+
+class DistanceMatrix:
+    """
+    Shortest path costs between every pair of a set of nodes.
+
+    Rows are computed with one single-source Dijkstra search per node,
+    spread over a process pool, and stored in a (k, k) NumPy array so
+    planning code can look costs up instead of searching the graph.
+    Unreachable pairs hold inf.
+    """
+
+    def __init__(self, nodes: List, distances: np.ndarray, version: Optional[int] = None):
+        """
+        Args:
+            nodes: Node names; list position is the matrix row and column
+            distances: Array of shape (k, k) with shortest path costs
+            version: Graph version the matrix was computed for
+        """
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.distances = np.asarray(distances, dtype=float).reshape(len(self.nodes), len(self.nodes))
+        self.version = version
+
+    @classmethod
+    def compute(cls, csr: CSRGraph, nodes: Iterable, closures: Optional[ClosureMask] = None,
+                max_workers: Optional[int] = None, version: Optional[int] = None) -> "DistanceMatrix":
+        """
+        Compute the matrix over the given nodes.
+
+        Args:
+            csr: Compiled CSRGraph snapshot
+            nodes: Node names; names missing from the graph are skipped
+            closures: Optional ClosureMask of roads to avoid
+            max_workers: Optional process pool size; 1 computes in this process
+            version: Graph version to record on the matrix
+
+        Returns:
+            DistanceMatrix over the nodes present in the graph
+        """
+        nodes = [node for node in nodes if node in csr.index]
+        ids = [csr.index[node] for node in nodes]
+
+        if max_workers == 1 or len(ids) < MIN_PARALLEL_SOURCES:
+            rows = [_row(csr, source, ids, closures) for source in ids]
+        else:
+            bits = closure_bits(csr, closures)
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(csr, bits)) as pool:
+                rows = list(pool.map(_distance_row, [(source, ids) for source in ids],
+                                     chunksize=max(1, len(ids) // 64)))
+
+        return cls(nodes, np.array(rows, dtype=float).reshape(len(ids), len(ids)), version)
+
+    def distance(self, u, v) -> float:
+        """Return the shortest path cost from u to v (inf if unreachable or unknown)."""
+        if u not in self.index or v not in self.index:
+            return float('inf')
+        return float(self.distances[self.index[u], self.index[v]])
+
+    def row(self, u) -> Dict:
+        """Return {node: cost} from u to every node of the matrix."""
+        return dict(zip(self.nodes, self.distances[self.index[u]].tolist()))
+
+    def nearest(self, u, candidates: Iterable) -> Tuple[Optional[str], float]:
+        """
+        Return the candidate closest to u.
+
+        Returns:
+            Tuple of (node, cost); (None, inf) if no candidate is reachable
+        """
+        best, best_cost = None, float('inf')
+        for candidate in candidates:
+            cost = self.distance(u, candidate)
+            if cost < best_cost:
+                best, best_cost = candidate, cost
+        return best, best_cost
+
+    def __contains__(self, node) -> bool:
+        return node in self.index
+
+    def __len__(self) -> int:
+        return len(self.nodes)
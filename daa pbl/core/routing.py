@@ -1,9 +1,11 @@
-from typing import Dict, List, Tuple, Set, Optional
+from typing import Dict, List, Tuple, Set, Optional, Union
 import heapq
 import networkx as nx
 from collections import defaultdict
+from core.graph import CSRGraph, ClosureMask, closure_bits
 
-def compute_dijkstra(graph: nx.Graph, start: str, end: str) -> Tuple[List[str], float]:
+def compute_dijkstra(graph: nx.Graph, start: str, end: str,
+                     closures: Optional[ClosureMask] = None) -> Tuple[List[str], float]:
     """
     Compute shortest path using Dijkstra's algorithm
     
@@ -11,6 +13,7 @@ def compute_dijkstra(graph: nx.Graph, start: str, end: str) -> Tuple[List[str],
         graph: NetworkX graph object
         start: Starting node
         end: Ending node
+        closures: Optional ClosureMask of roads to avoid
         
     Returns:
         Tuple of (path list, total cost)
@@ -35,6 +38,9 @@ def compute_dijkstra(graph: nx.Graph, start: str, end: str) -> Tuple[List[str],
         for neighbor in graph.neighbors(current):
             if neighbor in visited:
                 continue
+
+            if closures is not None and closures.blocks(current, neighbor):
+                continue
                 
             weight = graph.edges[current, neighbor]['weight']
             distance = current_distance + weight
@@ -57,36 +63,423 @@ def compute_dijkstra(graph: nx.Graph, start: str, end: str) -> Tuple[List[str],
     
     return path, distances[end]
 
+def csr_dijkstra(csr: CSRGraph, start: str, end: str,
+                 closures: Optional[ClosureMask] = None,
+                 stats: Optional[Dict] = None) -> Tuple[List[str], float]:
+    """
+    Compute shortest path using Dijkstra's algorithm on a compiled graph
+    
+    Args:
+        csr: Compiled CSRGraph snapshot
+        start: Starting node
+        end: Ending node
+        closures: Optional ClosureMask of roads to avoid
+        stats: Optional dict that receives the number of 'settled' nodes
+        
+    Returns:
+        Tuple of (path list, total cost)
+    """
+    if start not in csr.index or end not in csr.index:
+        return [], float('infinity')
+
+    target = csr.index[end]
+    distances, previous = shortest_path_tree(csr, csr.index[start], {target}, closures, stats)
+
+    if distances[target] == float('infinity'):
+        return [], float('infinity')
+
+    return csr.path_names(tree_path(previous, target)), distances[target]
+
+def shortest_path_tree(csr: CSRGraph, source: Union[int, List[int]],
+                       targets: Optional[Set[int]] = None,
+                       closures: Optional[ClosureMask] = None,
+                       stats: Optional[Dict] = None,
+                       max_distance: float = float('infinity')) -> Tuple[List[float], List[int]]:
+    """
+    Grow a Dijkstra shortest path tree from a source on a compiled graph
+    
+    Given several sources, all of them start at distance 0 and the result
+    is a forest in which every node hangs below its nearest source.
+    
+    Args:
+        csr: Compiled CSRGraph snapshot
+        source: Source node id, or a list of source node ids
+        targets: Optional set of node ids; the search stops once all are settled
+        closures: Optional ClosureMask of roads to avoid
+        stats: Optional dict that receives the number of 'settled' nodes
+        max_distance: Stop once every node within this distance is settled;
+            farther nodes may be left with tentative distances
+        
+    Returns:
+        Tuple of (distance list, predecessor list) indexed by node id,
+        with -1 as the predecessor of the source and of unreached nodes
+    """
+    indptr, indices, weights, edge_ids = csr._indptr, csr._indices, csr._weights, csr._edge_ids
+    bits = closure_bits(csr, closures)
+
+    distances = [float('infinity')] * csr.num_nodes
+    previous = [-1] * csr.num_nodes
+    visited = [False] * csr.num_nodes
+    sources = [source] if isinstance(source, int) else list(source)
+    for s in sources:
+        distances[s] = 0
+    remaining = set(targets) if targets is not None else None
+    pq = [(0, s) for s in sources]
+    settled = 0
+
+    while pq:
+        current_distance, current = heapq.heappop(pq)
+
+        if visited[current]:
+            continue
+        if current_distance > max_distance:
+            break
+
+        visited[current] = True
+        settled += 1
+
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+
+        lo, hi = indptr[current], indptr[current + 1]
+        for neighbor, weight, edge in zip(indices[lo:hi], weights[lo:hi], edge_ids[lo:hi]):
+            if visited[neighbor] or bits[edge >> 3] & (128 >> (edge & 7)):
+                continue
+
+            distance = current_distance + weight
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                heapq.heappush(pq, (distance, neighbor))
+
+    if stats is not None:
+        stats['settled'] = settled
+    return distances, previous
+
+def tree_path(previous: List[int], target: int) -> List[int]:
+    """Walk a predecessor list back from target and return the node id path."""
+    path = []
+    current = target
+    while current != -1:
+        path.append(current)
+        current = previous[current]
+    path.reverse()
+    return path
+
+def tree_origins(distances: List[float], previous: List[int]) -> List[int]:
+    """
+    Label every node of a (multi-source) shortest path tree with its root.
+    
+    Args:
+        distances: Distance list from shortest_path_tree
+        previous: Predecessor list from shortest_path_tree
+        
+    Returns:
+        List indexed by node id holding the source node id each node was
+        reached from, or -1 for unreached nodes
+    """
+    origins = [-1] * len(previous)
+    for node in range(len(previous)):
+        if origins[node] != -1 or distances[node] == float('infinity'):
+            continue
+        chain = []
+        current = node
+        while origins[current] == -1 and previous[current] != -1:
+            chain.append(current)
+            current = previous[current]
+        root = origins[current] if origins[current] != -1 else current
+        origins[current] = root
+        for member in chain:
+            origins[member] = root
+    return origins
+
+def csr_dijkstra_many(csr: CSRGraph, start: str, ends: List[str],
+                      closures: Optional[ClosureMask] = None) -> Dict[str, Tuple[List[str], float]]:
+    """
+    Compute shortest paths from one start to many ends with a single search
+    
+    Args:
+        csr: Compiled CSRGraph snapshot
+        start: Starting node
+        ends: Ending nodes
+        closures: Optional ClosureMask of roads to avoid
+        
+    Returns:
+        Dictionary mapping each end to a (path list, total cost) tuple;
+        unreachable ends map to ([], inf)
+    """
+    results = {end: ([], float('infinity')) for end in ends}
+    if start not in csr.index:
+        return results
+
+    targets = {csr.index[end] for end in ends if end in csr.index}
+    distances, previous = shortest_path_tree(csr, csr.index[start], targets, closures)
+
+    for end in ends:
+        target = csr.index.get(end)
+        if target is None or distances[target] == float('infinity'):
+            continue
+        results[end] = (csr.path_names(tree_path(previous, target)), distances[target])
+
+    return results
+
+def bidirectional_search(csr: CSRGraph, source: int, target: int,
+                         closures: Optional[ClosureMask] = None,
+                         potential: Optional[List[float]] = None,
+                         stats: Optional[Dict] = None) -> Tuple[List[int], float]:
+    """
+    Bidirectional Dijkstra between two node ids on a compiled graph
+    
+    A forward search from the source and a backward search from the target
+    take turns (the one with the smaller queue key goes next) and stop as
+    soon as the two smallest keys add up to at least the best meeting cost
+    found so far; no shorter path can exist after that point.
+    
+    With a potential p the forward search uses keys g + p(v) and the backward
+    search g - p(v), i.e. Dijkstra on reduced edge costs, which turns this
+    into bidirectional A*. The potential must be consistent in both
+    directions, e.g. the average potential (h_target - h_source) / 2 of two
+    consistent heuristics. Both searches then run on the same reduced edge
+    costs, so the stopping rule above stays exact.
+    
+    Args:
+        csr: Compiled CSRGraph snapshot
+        source: Source node id
+        target: Target node id
+        closures: Optional ClosureMask of roads to avoid
+        potential: Optional per-node potential list (zero if omitted)
+        stats: Optional dict that receives the number of 'settled' nodes
+        
+    Returns:
+        Tuple of (node id path, total cost); ([], inf) if unreachable
+    """
+    indptr, indices, weights, edge_ids = csr._indptr, csr._indices, csr._weights, csr._edge_ids
+    bits = closure_bits(csr, closures)
+    if potential is None:
+        potential = [0.0] * csr.num_nodes
+    sign = (1, -1)
+
+    n = csr.num_nodes
+    infinity = float('infinity')
+    dist = ([infinity] * n, [infinity] * n)
+    parent = ([-1] * n, [-1] * n)
+    done = (bytearray(n), bytearray(n))
+    dist[0][source] = 0
+    dist[1][target] = 0
+    queues = ([(potential[source], 0, source)], [(-potential[target], 0, target)])
+    best, meet = infinity, -1
+    if source == target:
+        best, meet = 0, source
+    settled = 0
+
+    while queues[0] and queues[1]:
+        if queues[0][0][0] + queues[1][0][0] >= best:
+            break
+
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        _, g, node = heapq.heappop(queues[side])
+        if done[side][node] or g > dist[side][node]:
+            continue
+        done[side][node] = 1
+        settled += 1
+
+        own, other, prev, queue, direction = dist[side], dist[1 - side], parent[side], queues[side], sign[side]
+        lo, hi = indptr[node], indptr[node + 1]
+        for neighbor, weight, edge in zip(indices[lo:hi], weights[lo:hi], edge_ids[lo:hi]):
+            if bits[edge >> 3] & (128 >> (edge & 7)):
+                continue
+
+            candidate = g + weight
+            if candidate < own[neighbor]:
+                own[neighbor] = candidate
+                prev[neighbor] = node
+                heapq.heappush(queue, (candidate + direction * potential[neighbor], candidate, neighbor))
+
+            if own[neighbor] + other[neighbor] < best:
+                best, meet = own[neighbor] + other[neighbor], neighbor
+
+    if stats is not None:
+        stats['settled'] = settled
+
+    if meet == -1:
+        return [], infinity
+
+    path = tree_path(parent[0], meet)
+    node = parent[1][meet]
+    while node != -1:
+        path.append(node)
+        node = parent[1][node]
+    return path, best
+
+def csr_bidirectional_dijkstra(csr: CSRGraph, start: str, end: str,
+                               closures: Optional[ClosureMask] = None,
+                               stats: Optional[Dict] = None) -> Tuple[List[str], float]:
+    """
+    Compute shortest path using bidirectional Dijkstra on a compiled graph
+    
+    Args:
+        csr: Compiled CSRGraph snapshot
+        start: Starting node
+        end: Ending node
+        closures: Optional ClosureMask of roads to avoid
+        stats: Optional dict that receives the number of 'settled' nodes
+        
+    Returns:
+        Tuple of (path list, total cost)
+    """
+    if start not in csr.index or end not in csr.index:
+        return [], float('infinity')
+
+    path, cost = bidirectional_search(csr, csr.index[start], csr.index[end], closures, stats=stats)
+    return csr.path_names(path), cost
+
 def find_alternative_routes(graph: nx.Graph, start: str, end: str, 
-                          max_alternatives: int = 3, max_detour: float = 1.5) -> List[Tuple[List[str], float]]:
+                          max_alternatives: int = 3, max_detour: float = 1.5,
+                          closures: Optional[ClosureMask] = None) -> List[Tuple[List[str], float]]:
     """
     Find alternative routes between two points
     
+    Enumerates simple paths in order of cost (Yen's algorithm) and stops at
+    the first one beyond the detour bound. Prefer csr_alternative_routes on
+    large graphs; Yen's algorithm can still enumerate many near-duplicates.
+    
     Args:
         graph: NetworkX graph object
         start: Starting location
         end: Ending location
         max_alternatives: Maximum number of alternative routes to find
         max_detour: Maximum allowed detour factor compared to shortest path
+        closures: Optional ClosureMask of roads to avoid
         
     Returns:
         List of tuples (path, cost) for each alternative route
     """
+    def is_open(u, v):
+        if graph[u][v].get('blocked', False):
+            return False
+        return closures is None or not closures.blocks(u, v)
+
+    view = nx.subgraph_view(graph, filter_edge=is_open)
+
     # First find the shortest path and its cost
-    shortest_path, min_cost = compute_dijkstra(graph, start, end)
+    shortest_path, min_cost = compute_dijkstra(view, start, end)
     if not shortest_path:
         return []
         
     # Use k-shortest paths algorithm to find alternatives
     routes = []
-    paths = nx.shortest_simple_paths(graph, start, end, weight='weight')
+    paths = nx.shortest_simple_paths(view, start, end, weight='weight')
     
     for path in paths:
         if len(routes) >= max_alternatives:
             break
             
-        cost = sum(graph.edges[path[i], path[i+1]]['weight'] for i in range(len(path)-1))
-        if cost <= min_cost * max_detour:
-            routes.append((path, cost))
+        cost = sum(view.edges[path[i], path[i+1]]['weight'] for i in range(len(path)-1))
+        if cost > min_cost * max_detour:
+            break  # Paths come in order of cost, so none of the rest qualify
+        routes.append((path, cost))
     
     return routes
+
+def _via_path(forward: Tuple[List[float], List[int]], backward: Tuple[List[float], List[int]],
+              via: int) -> Tuple[Optional[List[int]], Dict[Tuple[int, int], float]]:
+    """
+    Join the forward tree path to via with the backward tree path from via.
+
+    Returns:
+        Tuple of (node id path or None if it revisits a node, {edge: weight})
+    """
+    (df, pf), (db, pb) = forward, backward
+    path = tree_path(pf, via)
+    edges = {}
+    for a, b in zip(path, path[1:]):
+        edges[(min(a, b), max(a, b))] = df[b] - df[a]
+    node = via
+    while pb[node] != -1:
+        nxt = pb[node]
+        edges[(min(node, nxt), max(node, nxt))] = db[node] - db[nxt]
+        path.append(nxt)
+        node = nxt
+    if len(set(path)) != len(path):
+        return None, edges
+    return path, edges
+
+def csr_alternative_routes(csr: CSRGraph, start: str, end: str,
+                           max_alternatives: int = 3, max_detour: float = 1.5,
+                           closures: Optional[ClosureMask] = None,
+                           max_overlap: float = 0.8,
+                           forward: Optional[Tuple[List[float], List[int]]] = None,
+                           backward: Optional[Tuple[List[float], List[int]]] = None
+                           ) -> List[Tuple[List[str], float]]:
+    """
+    Find alternative routes between two points with the via-node method
+    
+    A forward tree from start and a backward tree from end, both bounded by
+    the detour limit, give for every node v the cost of the best route
+    through v as d(start, v) + d(v, end). Candidates are tried in order of
+    that cost. A route is accepted when it is simple and shares at most
+    max_overlap of its cost with the routes accepted before it. Every node
+    on a route that was already examined is skipped, because it lies on the
+    same plateau of both trees and would rebuild the same route. This keeps
+    the total work linear in the size of the two trees.
+    
+    Args:
+        csr: Compiled CSRGraph snapshot
+        start: Starting location
+        end: Ending location
+        max_alternatives: Maximum number of routes to return (including the shortest)
+        max_detour: Maximum allowed detour factor compared to shortest path
+        closures: Optional ClosureMask of roads to avoid
+        max_overlap: Maximum fraction of a route's cost shared with earlier routes
+        forward: Optional (distances, predecessors) tree from start to reuse
+        backward: Optional (distances, predecessors) tree from end to reuse
+        
+    Returns:
+        List of tuples (path, cost), shortest first
+    """
+    if start not in csr.index or end not in csr.index:
+        return []
+    source, target = csr.index[start], csr.index[end]
+
+    if forward is not None:
+        shortest = forward[0][target]
+    elif backward is not None:
+        shortest = backward[0][source]
+    else:
+        shortest = bidirectional_search(csr, source, target, closures)[1]
+    if shortest == float('infinity'):
+        return []
+
+    limit = shortest * max_detour
+    if forward is None:
+        forward = shortest_path_tree(csr, source, closures=closures, max_distance=limit)
+    if backward is None:
+        backward = shortest_path_tree(csr, target, closures=closures, max_distance=limit)
+
+    df, db = forward[0], backward[0]
+    candidates = sorted((df[v] + db[v], v) for v in range(csr.num_nodes) if df[v] + db[v] <= limit)
+
+    routes = []
+    shared = {}  # Edges of the accepted routes
+    covered = bytearray(csr.num_nodes)
+    for cost, via in candidates:
+        if covered[via]:
+            continue
+        path, edges = _via_path(forward, backward, via)
+        for node in (path or [via]):
+            covered[node] = 1
+        if path is None:
+            continue
+
+        overlap = sum(weight for edge, weight in edges.items() if edge in shared)
+        if routes and overlap > max_overlap * cost:
+            continue
+
+        routes.append((csr.path_names(path), cost))
+        shared.update(edges)
+        if len(routes) >= max_alternatives:
+            break
+
+    return routes
@@ -0,0 +1,177 @@
+from typing import Dict, List, Tuple, Optional, Iterable
+import heapq
+import math
+
+class GridIndex:
+    """
+    Uniform grid spatial index over named points.
+
+    Points are bucketed into square cells of side ``cell_size`` keyed by
+    their integer cell coordinates, so region queries only look at the
+    cells overlapping the region and nearest-neighbor queries search
+    outward ring by ring from the query cell. Inserts and removals are
+    O(1), which keeps the index cheap to maintain as nodes are added to
+    and deleted from the road network.
+    """
+
+    def __init__(self, cell_size: float = 10.0):
+        """
+        Args:
+            cell_size: Side length of a grid cell in map units
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self.cells = {}  # (ix, iy) -> {name: (x, y)}
+        self.points = {}  # name -> (x, y)
+        self._bounds = None  # (min ix, min iy, max ix, max iy) of cells ever used
+
+    @classmethod
+    def build(cls, positions: Dict, points_per_cell: float = 2.0) -> "GridIndex":
+        """
+        Build an index sized for the given points.
+
+        Args:
+            positions: Dictionary of node positions {node: (x, y)}
+            points_per_cell: Average number of points per occupied-area cell
+
+        Returns:
+            GridIndex containing every position
+        """
+        cell_size = 10.0
+        if len(positions) > 1:
+            xs = [x for x, _ in positions.values()]
+            ys = [y for _, y in positions.values()]
+            area = max(max(xs) - min(xs), 1e-9) * max(max(ys) - min(ys), 1e-9)
+            cell_size = math.sqrt(area * points_per_cell / len(positions)) or cell_size
+        index = cls(cell_size)
+        for name, (x, y) in positions.items():
+            index.insert(name, x, y)
+        return index
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def insert(self, name, x: float, y: float):
+        """Add a point, replacing any previous position stored under name."""
+        if name in self.points:
+            self.remove(name)
+        cell = self._cell(x, y)
+        self.cells.setdefault(cell, {})[name] = (x, y)
+        self.points[name] = (x, y)
+        if self._bounds is None:
+            self._bounds = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            lx, ly, hx, hy = self._bounds
+            self._bounds = (min(lx, cell[0]), min(ly, cell[1]), max(hx, cell[0]), max(hy, cell[1]))
+
+    def remove(self, name) -> bool:
+        """Remove a point; returns False if it was not indexed."""
+        if name not in self.points:
+            return False
+        x, y = self.points.pop(name)
+        cell = self._cell(x, y)
+        bucket = self.cells[cell]
+        del bucket[name]
+        if not bucket:
+            del self.cells[cell]
+        return True
+
+    def nearest(self, x: float, y: float, k: int = 1,
+                exclude: Optional[Iterable] = None) -> List[Tuple[str, float]]:
+        """
+        Find the k points closest to (x, y).
+
+        Args:
+            x, y: Query coordinates
+            k: Number of points to return
+            exclude: Optional names to skip (e.g. the query node itself)
+
+        Returns:
+            List of (name, distance) pairs, closest first
+        """
+        if k <= 0 or not self.points:
+            return []
+        exclude = set(exclude or ())
+        cx, cy = self._cell(x, y)
+        lx, ly, hx, hy = self._bounds
+        # Rings closer than the occupied area are empty; beyond max_ring nothing is left
+        ring = max(lx - cx, cx - hx, ly - cy, cy - hy, 0)
+        max_ring = max(abs(cx - lx), abs(cx - hx), abs(cy - ly), abs(cy - hy))
+
+        best = []  # Max-heap of (-distance, name) holding the k closest so far
+        while ring <= max_ring:
+            if 8 * ring > len(self.cells):
+                # Rings have outgrown the occupied cells: one scan of every point is cheaper
+                candidates = ((math.hypot(px - x, py - y), name)
+                              for name, (px, py) in self.points.items() if name not in exclude)
+                return [(name, dist) for dist, name in heapq.nsmallest(k, candidates)]
+            for cell in self._ring_cells(cx, cy, ring):
+                for name, (px, py) in self.cells.get(cell, {}).items():
+                    if name in exclude:
+                        continue
+                    dist = math.hypot(px - x, py - y)
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, name))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, name))
+            # Every unvisited point lies at least ring * cell_size away
+            if len(best) == k and -best[0][0] <= ring * self.cell_size:
+                break
+            ring += 1
+
+        return sorted(((name, -d) for d, name in best), key=lambda item: item[1])
+
+    def _ring_cells(self, cx: int, cy: int, ring: int):
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for ix in range(cx - ring, cx + ring + 1):
+            yield (ix, cy - ring)
+            yield (ix, cy + ring)
+        for iy in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, iy)
+            yield (cx + ring, iy)
+
+    def within_box(self, xmin: float, ymin: float, xmax: float, ymax: float) -> List[str]:
+        """Return the names of all points inside the axis-aligned box (edges included)."""
+        if not self.points:
+            return []
+        lx, ly = self._cell(xmin, ymin)
+        hx, hy = self._cell(xmax, ymax)
+        blx, bly, bhx, bhy = self._bounds
+        lx, ly, hx, hy = max(lx, blx), max(ly, bly), min(hx, bhx), min(hy, bhy)
+
+        found = []
+        if (hx - lx + 1) * (hy - ly + 1) > len(self.cells):
+            # Box covers more cells than are occupied: scan the occupied ones
+            cells = [cell for cell in self.cells if lx <= cell[0] <= hx and ly <= cell[1] <= hy]
+        else:
+            cells = [(ix, iy) for ix in range(lx, hx + 1) for iy in range(ly, hy + 1)]
+        for cell in cells:
+            for name, (px, py) in self.cells.get(cell, {}).items():
+                if xmin <= px <= xmax and ymin <= py <= ymax:
+                    found.append(name)
+        return found
+
+    def within_radius(self, x: float, y: float, radius: float) -> List[Tuple[str, float]]:
+        """
+        Return all points within radius of (x, y).
+
+        Returns:
+            List of (name, distance) pairs, closest first
+        """
+        found = []
+        for name in self.within_box(x - radius, y - radius, x + radius, y + radius):
+            px, py = self.points[name]
+            dist = math.hypot(px - x, py - y)
+            if dist <= radius:
+                found.append((name, dist))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def __contains__(self, name) -> bool:
+        return name in self.points
+
+    def __len__(self) -> int:
+        return len(self.points)
@@ -1,20 +1,31 @@
 import matplotlib.pyplot as plt
 import networkx as nx
-from core.routing import compute_dijkstra
-from core.astar import astar_path
-from core.knapsack import knapsack
+from core.routing import (compute_dijkstra, csr_dijkstra, csr_dijkstra_many, csr_bidirectional_dijkstra,
+                          tree_origins, tree_path, find_alternative_routes, csr_alternative_routes)
+from core.routing import shortest_path_tree as grow_shortest_path_tree
+from core.astar import astar_path, csr_astar_path, csr_bidirectional_astar, calibrate_heuristic, heuristic_table
+from core.graph import CSRGraph, ClosureMask
+from core.dynamic import DynamicShortestPathTree
+from core.cache import LRUCache
+from core.ch import ContractionHierarchy
+from core.landmarks import LandmarkIndex
+from core.matrix import DistanceMatrix
+from core.spatial import GridIndex
+from core.knapsack import knapsack_fingerprint, solve_loads, KNAPSACK_MEMORY_BUDGET
 import numpy as np
 import matplotlib.patches as patches
 from matplotlib.widgets import Button
 import os
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # Set matplotlib backend to non-interactive to prevent tkinter warnings
 import matplotlib
 matplotlib.use('Agg')
 
 class DisasterReliefSystem:
-    def __init__(self, supplies, vehicles, nodes, edges, demands):
+    def __init__(self, supplies, vehicles, nodes, edges, demands, route_cache_size=4096,
+                 heuristic_cache_size=64, knapsack_cache_size=1024):
         self.graph = nx.Graph()
         self.pos = {}
         self.supplies = supplies
@@ -26,6 +37,37 @@ class DisasterReliefSystem:
         self.blocked_roads = set()  # Store blocked roads
         self.use_astar = True  # Use A* by default
         self.assignments = []  # Store assignments
+        self.use_compiled_graph = True  # Route on the CSR snapshot
+        self.use_ch = False  # Answer find_path from a Contraction Hierarchies index
+        self.bidirectional = False  # Search from both ends on the CSR snapshot
+        self.nearest_depot = True  # Dispatch each delivery from its nearest reachable warehouse
+        self.knapsack_memory_budget = KNAPSACK_MEMORY_BUDGET  # Bytes for a load planning table
+        self.weight_resolution = 0.01  # Supply weights are planned in multiples of this (None truncates)
+        self.knapsack_solver = "auto"  # "auto", "dp", "branch_and_bound" or "meet_in_middle"
+        self.knapsack_epsilon = None  # Set in (0, 1), e.g. 0.05, to plan weight-only loads with the FPTAS
+        self.planning_workers = None  # Process pool size for load planning (None: all cores, 1: in process)
+        self.astar_heuristic = "euclidean"  # "euclidean" or "alt" (landmark bounds)
+        self.astar_epsilon = 1.0  # Weighted A*: routes cost at most epsilon times optimal
+        self.num_landmarks = 8
+        self.landmark_method = "farthest"  # "farthest" or "avoid"
+        self._compiled = None  # Cached CSRGraph, rebuilt after graph edits
+        self._closures = None  # ClosureMask of blocked_roads over the CSR snapshot
+        self._spt = {}  # DynamicShortestPathTree per warehouse source, repaired on road changes
+        self._ch = None  # ContractionHierarchy of the open network (closures are not contracted)
+        self._ch_version = None  # network_version the hierarchy was built or loaded for
+        self._landmarks = None  # LandmarkIndex for the current graph
+        self._heuristic_scale = None  # Calibrated Euclidean heuristic factor
+        self._matrix = None  # DistanceMatrix over the interesting nodes
+        self._planning_pool = None  # (workers, ProcessPoolExecutor) reused by plan_loads
+        self.graph_version = 0  # Bumped on every change to the road network
+        self.network_version = 0  # Bumped only when nodes or roads are added or removed
+        self.route_cache = LRUCache(route_cache_size)  # (version, closures, algorithm, source, target) -> (path, cost)
+        self.heuristic_cache = LRUCache(heuristic_cache_size)  # (network version, heuristic, epsilon, goal) -> heuristic table
+        self.knapsack_cache = LRUCache(knapsack_cache_size)  # (instance fingerprint, solver, epsilon) -> load plan
+        self.last_route_changes = []  # Assignments rerouted by the last road change
+        self.unrouted = set()  # Locations skipped in the last run for lack of a path
+        self.remaining_stock = {}  # Units left per supply with a 'quantity' during the last run
+        self.needs_replan = False  # Set when incremental rerouting is not enough
 
         # Node color mapping
         self.type_colors = {
@@ -45,12 +87,14 @@ class DisasterReliefSystem:
         for edge in edges:
             self.graph.add_edge(edge["from"], edge["to"], weight=edge["weight"], blocked=False)
 
+        self.spatial = GridIndex.build(self.pos)  # Grid index over node positions
+
     def block_road(self, from_node, to_node):
         """Block a road and recalculate routes."""
         if self.graph.has_edge(from_node, to_node):
             self.graph[from_node][to_node]['blocked'] = True
             self.blocked_roads.add(tuple(sorted([from_node, to_node])))
-            self.recalculate_routes()
+            self._apply_road_change(from_node, to_node, blocked=True)
             return True
         return False
 
@@ -59,60 +103,283 @@ class DisasterReliefSystem:
         if self.graph.has_edge(from_node, to_node):
             self.graph[from_node][to_node]['blocked'] = False
             self.blocked_roads.discard(tuple(sorted([from_node, to_node])))
-            self.recalculate_routes()
+            self._apply_road_change(from_node, to_node, blocked=False)
             return True
         return False
 
-    def recalculate_routes(self):
-        """Recalculate routes using existing assignments."""
+    def _apply_road_change(self, from_node, to_node, blocked):
+        """
+        Repair cached shortest path trees after a road was (un)blocked and
+        reroute only the assignments whose path changed.
+
+        The outcome is stored in self.last_route_changes, and
+        self.needs_replan is set when the incremental update cannot stand in
+        for a full run_simulation (a destination became unreachable, or a
+        previously unreachable one became reachable).
+        """
+        csr = self.compiled_graph()
+        edge = csr.edge_id(from_node, to_node)
+        self.graph_version += 1
+        if blocked:
+            self._closures = self.closures.with_closed(edge)
+        else:
+            self._closures = self.closures.with_open(edge)
+
+        changed_nodes = set()
+        for tree in self._spt.values():
+            if blocked:
+                changed_nodes |= tree.block_edge(edge, self._closures)
+            else:
+                changed_nodes |= tree.unblock_edge(edge, self._closures)
+
+        # None means every route has to be recomputed
+        changed = None
+        if self.use_compiled_graph and self._spt:
+            changed = {csr.nodes[i] for i in changed_nodes}
+
+        self.last_route_changes = self.recalculate_routes(changed)
+        if self.unrouted and (changed is None or self.unrouted & changed):
+            self.needs_replan = True
+
+    def _route_changes(self, previous, rerouted):
+        """
+        Report how a full replan changed the assignments, in the format of recalculate_routes.
+
+        Args:
+            previous: {location: assignment} before the replan
+            rerouted: {location: change} from the incremental reroute that
+                preceded it; its old costs are the ones before the road change
+        """
+        current = {a['location']: a for a in self.assignments}
+        changes = []
+        for location in list(previous) + [loc for loc in current if loc not in previous]:
+            old, new = previous.get(location), current.get(location)
+            if (location not in rerouted and old and new and old['path'] == new['path']
+                    and old['vehicle']['id'] == new['vehicle']['id']):
+                continue
+            if location in rerouted:
+                old_cost = rerouted[location]['old_cost']
+            else:
+                old_cost = old.get('cost', float('inf')) if old else float('inf')
+            changes.append({
+                'location': location,
+                'vehicle_id': (new or old)['vehicle']['id'],
+                'depot': new.get('depot') if new else None,
+                'old_cost': old_cost,
+                'new_cost': new['cost'] if new else float('inf'),
+                'path': new['path'] if new else []
+            })
+        return changes
+
+    def recalculate_routes(self, changed_locations=None):
+        """
+        Recalculate routes using existing assignments.
+
+        Args:
+            changed_locations: Optional set of locations whose shortest path
+                may have changed; other assignments keep their stored route.
+                None recomputes every route.
+
+        Returns:
+            list: One entry per rerouted assignment with its location,
+                  vehicle id, old and new cost and new path
+        """
         if not self.assignments:
-            return
+            return []
 
-        self.routes_info = []  # Clear only routes
-        warehouse = next(n for n, d in self.graph.nodes(data=True) if d['type'] == "warehouse")
         undelivered = []
+        changes = []
+        stale = [a for a in self.assignments
+                 if changed_locations is None or a['location'] in changed_locations]
+        paths = self.find_paths_from_depots([a['location'] for a in stale])
 
-        for assignment in self.assignments:
+        for assignment in stale:
             location = assignment['location']
             vehicle = assignment['vehicle']
             items = assignment['items']
+            old_cost = assignment.get('cost', float('inf'))
 
             try:
-                path, cost = self.find_path(warehouse, location)
+                depot, path, cost = paths[location]
                 if not path:
+                    assignment['depot'], assignment['path'], assignment['cost'] = None, [], float('inf')
                     raise ValueError(f"No valid path found to {location}")
 
                 print(f"🔄 Recalculating route to {location}")
                 print(f"🚛 Vehicle {vehicle['id']} carrying: {items}")
-                print(f"🛣️ New route: {path} | Cost: {cost}")
-
-                for i in range(len(path) - 1):
-                    u, v = path[i], path[i + 1]
-                    label = f"V{vehicle['id']}: {', '.join(items)}"
-                    self.routes_info.append(((u, v), label))
+                print(f"🛣️ New route from {depot}: {path} | Cost: {cost}")
+                assignment['depot'], assignment['path'], assignment['cost'] = depot, path, cost
 
             except Exception as e:
                 print(f"❌ Failed to find new route to {location}: {e}")
                 undelivered.append(location)
 
+            changes.append({
+                'location': location,
+                'vehicle_id': vehicle['id'],
+                'depot': assignment.get('depot'),
+                'old_cost': old_cost,
+                'new_cost': assignment['cost'],
+                'path': assignment['path']
+            })
+
+        self._rebuild_routes_info()
+
         if undelivered:
+            self.needs_replan = True
             print(f"⚠️ Warning: Could not reroute to: {', '.join(undelivered)}")
 
+        return changes
+
+    def _rebuild_routes_info(self):
+        """Rebuild the edge labels used for plotting from the stored assignment paths."""
+        self.routes_info = []
+        for assignment in self.assignments:
+            path = assignment.get('path', [])
+            label = self._load_label(assignment)
+            for i in range(len(path) - 1):
+                self.routes_info.append(((path[i], path[i + 1]), label))
+
+    def _available_supplies(self, needed_supplies):
+        """Needed supplies still in stock, each with the units left as its 'quantity'."""
+        return [dict(item, quantity=self.remaining_stock.get(item["name"], 1))
+                for item in self.supplies
+                if item["name"] in needed_supplies and self.remaining_stock.get(item["name"], 1) > 0]
+
+    def plan_load(self, available, capacity, volume_capacity=None):
+        """
+        Choose the units of each supply to load on one vehicle, reusing
+        the plan of an identical earlier instance.
+
+        Args:
+            available: Supply dictionaries, with 'quantity' for stocked ones
+                and 'volume' for bulky ones
+            capacity: Vehicle capacity
+            volume_capacity: Optional cargo volume of the vehicle
+
+        Returns:
+            Tuple of (value, {supply name: units} for the units loaded,
+            guarantee that value is at least this fraction of optimal)
+        """
+        return self.plan_loads([(available, capacity, volume_capacity)])[0]
+
+    def planning_pool(self):
+        """Return the process pool for load planning, starting it on first use."""
+        if self._planning_pool is None or self._planning_pool[0] != self.planning_workers:
+            self.close()
+            self._planning_pool = (self.planning_workers,
+                                   ProcessPoolExecutor(max_workers=self.planning_workers))
+        return self._planning_pool[1]
+
+    def close(self):
+        """Shut down the load planning process pool, if one was started."""
+        if self._planning_pool is not None:
+            self._planning_pool[1].shutdown()
+            self._planning_pool = None
+
+    def plan_loads(self, problems):
+        """
+        Plan several independent vehicle loads, solving the ones not in the
+        load plan cache together, in the planning pool when there is enough work.
+
+        Args:
+            problems: List of (available, capacity, volume_capacity) tuples
+                as taken by plan_load()
+
+        Returns:
+            List of plan_load() results in problem order
+        """
+        keys = []
+        for available, capacity, volume_capacity in problems:
+            # Only the Pareto and Lagrangian solvers handle a volume limit; they
+            # report their own guarantee and knapsack_epsilon does not apply
+            solver = self._knapsack_solver() if volume_capacity is None else "auto"
+            keys.append((knapsack_fingerprint(available, capacity, self.weight_resolution,
+                                              volume_capacity),
+                         solver, self.knapsack_epsilon if solver == "fptas" else None))
+        plans = [self.knapsack_cache.get(key) for key in keys]
+
+        # Identical problems within the batch are solved once, grouped by solver
+        missing = {}
+        for i, plan in enumerate(plans):
+            if plan is None:
+                missing.setdefault(keys[i][1], {}).setdefault(keys[i], []).append(i)
+        for solver, batch in missing.items():
+            solved = solve_loads([problems[indices[0]] for indices in batch.values()],
+                                 max_workers=self.planning_workers,
+                                 pool=self.planning_pool,
+                                 memory_budget=self.knapsack_memory_budget,
+                                 resolution=self.weight_resolution,
+                                 solver=solver,
+                                 **({"epsilon": self.knapsack_epsilon} if solver == "fptas" else {}))
+            for (key, indices), (value, counts, guarantee) in zip(batch.items(), solved):
+                available = problems[indices[0]][0]
+                quantities = {item["name"]: count for item, count in zip(available, counts) if count}
+                plan = (value, quantities, guarantee)
+                self.knapsack_cache.put(key, plan)
+                for i in indices:
+                    plans[i] = plan
+
+        # Callers own their copy; the cached plan stays untouched
+        return [(value, dict(quantities), guarantee) for value, quantities, guarantee in plans]
+
+    @property
+    def knapsack_epsilon(self):
+        """Relative error allowed when planning loads with the FPTAS; None plans them exactly."""
+        return self._knapsack_epsilon
+
+    @knapsack_epsilon.setter
+    def knapsack_epsilon(self, epsilon):
+        if epsilon is not None and not 0 < epsilon < 1:
+            raise ValueError(f"knapsack_epsilon must be between 0 and 1, got {epsilon}")
+        self._knapsack_epsilon = epsilon
+
+    def _knapsack_solver(self):
+        """Solver for load planning: the FPTAS when knapsack_epsilon is set."""
+        return "fptas" if self.knapsack_epsilon else self.knapsack_solver
+
+    @staticmethod
+    def _load_label(assignment):
+        """Edge label for an assignment, e.g. "V1: Water×3, Medicine"."""
+        quantities = assignment.get('quantities', {})
+        items = [f"{name}×{quantities[name]}" if quantities.get(name, 1) > 1 else name
+                 for name in assignment['items']]
+        return f"V{assignment['vehicle']['id']}: {', '.join(items)}"
+
     def run_simulation(self, save_img=False):
         """Run initial simulation and store assignments."""
         print("\n=== Running Simulation ===")
+        # A replan forced by a road change reports its route changes like the incremental path
+        previous = rerouted = None
+        if self.needs_replan:
+            previous = {a['location']: a for a in self.assignments}
+            rerouted = {change['location']: change for change in self.last_route_changes}
+        self.last_route_changes = []
         self.assignments = []  # Clear previous assignments
         self.vehicles = self.original_vehicles.copy()
         self.routes_info = []
+        self.unrouted = set()
+        self.needs_replan = False
+        # Supplies with a 'quantity' are stocked goods drawn down by every load;
+        # supplies without one are unlimited and loaded at most once per vehicle
+        self.remaining_stock = {item["name"]: int(item["quantity"])
+                                for item in self.supplies if item.get("quantity") is not None}
         
-        warehouse = next(n for n, d in self.graph.nodes(data=True) if d['type'] == "warehouse")
         undelivered = []
 
+        # One (multi-source) shortest path tree from the warehouses serves every location
+        paths = self.find_paths_from_depots(
+            [location for location, needed in self.supply_demand.items() if needed])
+
         # Debug print
         print(f"Current supply demands: {self.supply_demand}")
         print(f"Available supplies: {self.supplies}")
         print(f"Available vehicles: {self.vehicles}")
 
+        # Phase 1 (sequential): hand out vehicles in location order. Routes are
+        # already known, so a vehicle whose location cannot be reached goes
+        # straight back to the end of the pool, as before.
+        jobs = []  # (location, needed supplies, vehicle)
         for location, needed_supplies in self.supply_demand.items():
             if not needed_supplies:  # Skip if no supplies needed
                 continue
@@ -122,57 +389,552 @@ class DisasterReliefSystem:
                 continue
 
             vehicle = self.vehicles.pop(0)
-            available = [item for item in self.supplies if item["name"] in needed_supplies]
-            
-            if not available:
+            if not self._available_supplies(needed_supplies):
                 undelivered.append(location)
                 continue
 
-            try:
-                print(f"\n📍 Planning delivery to {location}")
-                print(f"Needed supplies: {needed_supplies}")
-                print(f"Available supplies for delivery: {[item['name'] for item in available]}")
+            if not paths[location][1]:
+                print(f"❌ Could not compute path to {location}: No valid path found to {location}")
+                self.unrouted.add(location)
+                undelivered.append(location)
+                # Return vehicle to pool if delivery failed
+                self.vehicles.append(vehicle)
+                continue
 
-                value, selected_indexes = knapsack(available, vehicle["capacity"])
-                selected_items = [available[i]["name"] for i in selected_indexes]
+            jobs.append((location, needed_supplies, vehicle))
 
-                print(f"Selected items for delivery: {selected_items}")
-                
-                path, cost = self.find_path(warehouse, location)
-                if not path:
-                    raise ValueError(f"No valid path found to {location}")
-                    
-                print(f"🔹 Route: {path} | Cost: {cost}")
-
-                # Store assignment
-                self.assignments.append({
-                    'location': location,
-                    'vehicle': vehicle,
-                    'items': selected_items
-                })
+        # Phase 2: plan the loads. Loads drawing on stocked supplies depend on
+        # the ones before them and are planned in order; all other loads are
+        # independent and solved together in a process pool.
+        def is_stocked(needed):
+            return any(name in self.remaining_stock for name in needed)
 
-                for i in range(len(path) - 1):
-                    u, v = path[i], path[i + 1]
-                    label = f"V{vehicle['id']}: {', '.join(selected_items)}"
-                    self.routes_info.append(((u, v), label))
+        independent = [job for job in jobs if not is_stocked(job[1])]
+        plans = dict(zip(
+            (job[0] for job in independent),
+            self.plan_loads([(self._available_supplies(needed), vehicle["capacity"],
+                              vehicle.get("volume_capacity"))
+                             for _, needed, vehicle in independent])))
 
-            except Exception as e:
-                print(f"❌ Could not compute path to {location}: {e}")
+        # Phase 3 (sequential): merge the plans in location order
+        for location, needed_supplies, vehicle in jobs:
+            available = self._available_supplies(needed_supplies)
+            if not available:  # Stock ran out on earlier loads
                 undelivered.append(location)
-                # Return vehicle to pool if delivery failed
-                self.vehicles.append(vehicle)
+                continue
+
+            print(f"\n📍 Planning delivery to {location}")
+            print(f"Needed supplies: {needed_supplies}")
+            print(f"Available supplies for delivery: {[item['name'] for item in available]}")
+
+            if location in plans:
+                value, quantities, guarantee = plans[location]
+            else:
+                value, quantities, guarantee = self.plan_load(available, vehicle["capacity"],
+                                                              vehicle.get("volume_capacity"))
+            selected_items = list(quantities)
+
+            print(f"Selected items for delivery: {quantities}")
+
+            depot, path, cost = paths[location]
+            print(f"🔹 Route from {depot}: {path} | Cost: {cost}")
+
+            # Store assignment
+            assignment = {
+                'location': location,
+                'vehicle': vehicle,
+                'items': selected_items,
+                'quantities': quantities,
+                'value': value,
+                'guarantee': guarantee,  # value >= guarantee * best possible
+                'depot': depot,
+                'path': path,
+                'cost': cost
+            }
+            self.assignments.append(assignment)
+
+            # Loaded units leave the warehouse stock
+            for name, count in quantities.items():
+                if name in self.remaining_stock:
+                    self.remaining_stock[name] -= count
+
+            label = self._load_label(assignment)
+            for i in range(len(path) - 1):
+                u, v = path[i], path[i + 1]
+                self.routes_info.append(((u, v), label))
 
         if undelivered:
             print(f"\n⚠️ Warning: Could not deliver to: {', '.join(undelivered)}")
 
+        cache_stats = self.knapsack_cache.stats()
+        print(f"📦 Load plan cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+        if previous is not None:
+            self.last_route_changes = self._route_changes(previous, rerouted)
+
         # Return the image filename from plot_annotated_graph
         return self.plot_annotated_graph(save=save_img)
 
+    def compiled_graph(self):
+        """Return the CSR snapshot of the road network, compiling it if needed."""
+        if self._compiled is None:
+            self._compiled = CSRGraph.from_networkx(self.graph, self.pos)
+        return self._compiled
+
+    @property
+    def closures(self):
+        """ClosureMask of the currently blocked roads over the CSR snapshot."""
+        if self._closures is None:
+            self._closures = ClosureMask.from_roads(self.compiled_graph(), self.blocked_roads)
+        return self._closures
+
+    def _invalidate_graph(self):
+        """Drop derived routing structures after the road network changed."""
+        self._compiled = None
+        self._closures = None
+        self._spt = {}
+        self._ch = None
+        self._landmarks = None
+        self._heuristic_scale = None
+        self._matrix = None
+        self.graph_version += 1
+        self.network_version += 1
+
+    def shortest_path_tree(self, source):
+        """
+        Return the cached dynamic shortest path tree from source, building it if needed.
+
+        A tuple of nodes builds a multi-source tree in which every node hangs
+        below its nearest source.
+        """
+        if source not in self._spt:
+            csr = self.compiled_graph()
+            if isinstance(source, tuple):
+                ids = [csr.index[s] for s in source]
+            else:
+                ids = csr.index[source]
+            self._spt[source] = DynamicShortestPathTree(csr, ids, self.closures)
+        return self._spt[source]
+
+    def warehouses(self):
+        """Return the warehouse nodes in graph order."""
+        return [n for n, d in self.graph.nodes(data=True) if d['type'] == "warehouse"]
+
+    def contraction_hierarchy(self):
+        """
+        Return the Contraction Hierarchies index, building it if it is missing or stale.
+
+        The index covers the open network, so blocking and unblocking roads
+        keeps it; see _search_path for how closures are honoured.
+        """
+        if self._ch is None or self._ch_version != self.network_version:
+            self.rebuild_contraction_hierarchy()
+        return self._ch
+
+    def rebuild_contraction_hierarchy(self):
+        """(Re)build the Contraction Hierarchies index, e.g. after connect_new_node or delete_node."""
+        print("Building contraction hierarchy...")
+        self._ch = ContractionHierarchy.build(self.compiled_graph())
+        self._ch_version = self.network_version
+        print(f"Contraction hierarchy built with {len(self._ch.shortcuts)} shortcuts")
+        return self._ch
+
+    def save_contraction_hierarchy(self, filename):
+        """Persist the Contraction Hierarchies index to a file."""
+        self.contraction_hierarchy().save(filename)
+
+    def load_contraction_hierarchy(self, filename):
+        """
+        Load a persisted Contraction Hierarchies index.
+
+        Args:
+            filename: File written by save_contraction_hierarchy
+
+        Returns:
+            bool: True if the index matches the current (open) network and
+                  was installed; False if it is stale (it is then ignored)
+        """
+        ch = ContractionHierarchy.load(filename)
+        if not ch.matches(self.compiled_graph()):
+            print(f"Contraction hierarchy in {filename} does not match the current network")
+            return False
+        self._ch = ch
+        self._ch_version = self.network_version
+        return True
+
+    def nearest_nodes(self, x, y, k=1):
+        """Return the k nodes closest to (x, y) as (name, distance) pairs, closest first."""
+        return self.spatial.nearest(x, y, k)
+
+    def nodes_in_region(self, xmin, ymin, xmax, ymax):
+        """Return the nodes inside the given bounding box."""
+        return self.spatial.within_box(xmin, ymin, xmax, ymax)
+
+    def nodes_within(self, x, y, radius):
+        """Return the nodes within radius of (x, y) as (name, distance) pairs, closest first."""
+        return self.spatial.within_radius(x, y, radius)
+
+    def interesting_nodes(self):
+        """Return the warehouses, hospitals, shelters and affected areas in graph order."""
+        kinds = {"warehouse", "hospital", "shelter", "affected", "affected area"}
+        return [n for n, d in self.graph.nodes(data=True) if d['type'] in kinds]
+
+    def distance_matrix(self, max_workers=None):
+        """
+        Return shortest path costs between all interesting nodes.
+
+        The matrix is computed with one Dijkstra search per node in a
+        process pool and reused until the road network or the blocked roads
+        change (both bump graph_version).
+
+        Args:
+            max_workers: Optional process pool size; 1 computes in this process
+
+        Returns:
+            DistanceMatrix for the current graph and closures
+        """
+        if self._matrix is None or self._matrix.version != self.graph_version:
+            nodes = self.interesting_nodes()
+            print(f"Computing distance matrix for {len(nodes)} locations...")
+            self._matrix = DistanceMatrix.compute(self.compiled_graph(), nodes, self.closures,
+                                                  max_workers, self.graph_version)
+        return self._matrix
+
+    def landmark_index(self):
+        """Return the ALT landmark distance tables, recomputing them after graph edits."""
+        if self._landmarks is None:
+            self._landmarks = LandmarkIndex(self.compiled_graph(), self.num_landmarks, self.landmark_method)
+        return self._landmarks
+
+    def heuristic_scale(self):
+        """Return the calibrated Euclidean heuristic factor, recomputing it after graph edits."""
+        if self._heuristic_scale is None:
+            self._heuristic_scale = calibrate_heuristic(self.compiled_graph())
+            print(f"📐 A* heuristic calibrated: straight-line distance x {self._heuristic_scale:.4f}")
+        return self._heuristic_scale
+
+    def goal_heuristic(self, goal):
+        """
+        Return the A* heuristic table for goal, reusing it across queries.
+
+        Tables are keyed by network version, heuristic kind, epsilon and goal,
+        so routing many depots to the same hospital or shelter computes the
+        heuristic only once. Closures do not affect the table, so tables
+        survive blocking and unblocking roads.
+        """
+        csr = self.compiled_graph()
+        if goal not in csr.index:
+            return None
+        key = (self.network_version, self.astar_heuristic, max(1.0, self.astar_epsilon), goal)
+        table = self.heuristic_cache.get(key)
+        if table is None:
+            landmarks = self.landmark_index() if self.astar_heuristic == "alt" else None
+            scale = self.heuristic_scale() if landmarks is None else 1.0
+            table = heuristic_table(csr, csr.index[goal], landmarks, scale, max(1.0, self.astar_epsilon))
+            self.heuristic_cache.put(key, table)
+        return table
+
+    def route_quality_bound(self):
+        """
+        Return the guaranteed quality of find_path routes.
+
+        Every route costs at most this factor times the optimal route cost:
+        epsilon for weighted A*, 1.0 (optimal) for every other mode.
+        """
+        if self.use_astar and not (self.use_compiled_graph and self.use_ch):
+            return max(1.0, self.astar_epsilon)
+        return 1.0
+
+    def _weighted_astar(self):
+        return self.use_astar and self.astar_epsilon > 1.0
+
+    def _route_algorithm(self):
+        if self.use_compiled_graph and self.use_ch:
+            return "ch"
+        if self.use_astar:
+            algorithm = "astar-alt" if self.astar_heuristic == "alt" else "astar"
+            if self._weighted_astar():
+                return f"{algorithm}-w{self.astar_epsilon:g}"
+        else:
+            algorithm = "dijkstra"
+        if self.use_compiled_graph and self.bidirectional:
+            return "bi-" + algorithm
+        return algorithm
+
+    def _route_key(self, algorithm, source, target):
+        return (self.graph_version, self.closures.bits, algorithm, source, target)
+
     def find_path(self, start, end):
-        """Find path using either A* or Dijkstra's algorithm."""
+        """Find path using either A* or Dijkstra's algorithm, reusing cached routes."""
+        key = self._route_key(self._route_algorithm(), start, end)
+        cached = self.route_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._search_path(start, end)
+        self.route_cache.put(key, result)
+        return result
+
+    def _search_path(self, start, end):
+        if self.use_compiled_graph and self.use_ch:
+            path, cost = self.contraction_hierarchy().query(start, end)
+            # Closures only make routes longer, so a shortest open-network route
+            # that avoids them is still shortest; otherwise search around them
+            closures = self.closures
+            if not any(closures.blocks(u, v) for u, v in zip(path, path[1:])):
+                return path, cost
+            return csr_bidirectional_dijkstra(self.compiled_graph(), start, end, closures)
+        landmarks = self.landmark_index() if self.astar_heuristic == "alt" else None
+        scale = self.heuristic_scale() if self.use_astar and landmarks is None else 1.0
+        epsilon = max(1.0, self.astar_epsilon)
+        if self.use_compiled_graph:
+            csr = self.compiled_graph()
+            # Weighted A* breaks the bidirectional stopping rule, so it always runs forward only
+            if self.bidirectional and not self._weighted_astar():
+                if self.use_astar:
+                    return csr_bidirectional_astar(csr, start, end, self.closures, landmarks, scale=scale)
+                return csr_bidirectional_dijkstra(csr, start, end, self.closures)
+            if self.use_astar:
+                return csr_astar_path(csr, start, end, self.closures, landmarks,
+                                      scale=scale, epsilon=epsilon, table=self.goal_heuristic(end))
+            return csr_dijkstra(csr, start, end, self.closures)
         if self.use_astar:
-            return astar_path(self.graph, start, end, self.pos)
-        return compute_dijkstra(self.graph, start, end)
+            return astar_path(self.graph, start, end, self.pos, self.closures, landmarks,
+                              scale=scale, epsilon=epsilon, table=self.goal_heuristic(end),
+                              index=self.compiled_graph().index)
+        return compute_dijkstra(self.graph, start, end, self.closures)
+
+    def alternative_routes(self, start, end, max_alternatives=3, max_detour=1.5):
+        """
+        Find backup routes between two locations, shortest first.
+
+        On the compiled graph this uses the via-node engine and reuses any
+        cached shortest path tree rooted at start or end; results are cached
+        per graph version and closure set like single routes.
+
+        Args:
+            start: Starting location
+            end: Ending location
+            max_alternatives: Maximum number of routes (including the shortest)
+            max_detour: Maximum cost factor compared to the shortest route
+
+        Returns:
+            list: (path, cost) tuples
+        """
+        if not self.use_compiled_graph:
+            return find_alternative_routes(self.graph, start, end, max_alternatives,
+                                           max_detour, self.closures)
+
+        key = self._route_key(("alternatives", max_alternatives, max_detour), start, end)
+        cached = self.route_cache.get(key)
+        if cached is not None:
+            return cached
+
+        forward, backward = self._spt.get(start), self._spt.get(end)
+        routes = csr_alternative_routes(
+            self.compiled_graph(), start, end, max_alternatives, max_detour, self.closures,
+            forward=(forward.dist, forward.parent) if forward else None,
+            backward=(backward.dist, backward.parent) if backward else None)
+        self.route_cache.put(key, routes)
+        return routes
+
+    def evaluate_closure_scenarios(self, scenarios, source, targets, max_workers=None):
+        """
+        Evaluate what-if road closure scenarios without touching the live graph.
+
+        Each scenario is a ClosureMask over the shared CSR snapshot, so the
+        scenarios are searched concurrently with no copying or locking.
+
+        Args:
+            scenarios: List of scenarios, each a list of (from, to) roads to
+                       close on top of the currently blocked roads
+            source: Starting node
+            targets: Iterable of target nodes
+            max_workers: Optional thread pool size
+
+        Returns:
+            list: One {target: (path, cost)} dict per scenario, in order
+        """
+        csr = self.compiled_graph()
+        targets = list(targets)
+        masks = []
+        for roads in scenarios:
+            edges = [csr.edge_id(u, v) for u, v in roads]
+            masks.append(self.closures.with_closed(*[e for e in edges if e is not None]))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda mask: csr_dijkstra_many(csr, source, targets, mask), masks))
+
+    def find_paths_from(self, source, targets):
+        """
+        Find paths from one source to many targets.
+
+        With the compiled graph a single shortest path tree is grown from
+        the source and every target's path is read from it, instead of
+        running one search per target. Trees from warehouses are kept and
+        repaired on road changes; trees from other sources stop growing once
+        every target is settled and are discarded after the call. Routes already in the route cache for the current
+        graph version and closures are not searched again.
+
+        Args:
+            source: Starting node
+            targets: Iterable of target nodes
+
+        Returns:
+            dict: {target: (path, cost)}, with a falsy path for unreachable targets
+        """
+        results = {}
+        missing = []
+        for target in targets:
+            cached = self.route_cache.get(self._route_key("dijkstra", source, target))
+            if cached is not None:
+                results[target] = cached
+            else:
+                missing.append(target)
+
+        if not missing:
+            return results
+
+        if not self.use_compiled_graph:
+            # Point-to-point searches may be approximate (weighted A*), so
+            # find_path caches them under their own algorithm, not "dijkstra"
+            results.update({target: self.find_path(source, target) for target in missing})
+            return results
+
+        found = self._paths_from_tree(source, missing)
+        for target, result in found.items():
+            self.route_cache.put(self._route_key("dijkstra", source, target), result)
+        results.update(found)
+        return results
+
+    def batch_routes(self, pairs):
+        """
+        Answer many (origin, destination) route queries at once.
+
+        Queries are grouped by origin so every origin costs one one-to-many
+        search (see find_paths_from) no matter how many destinations it has.
+        Origins with a single destination use find_path, so they honour the
+        point-to-point options (use_ch, bidirectional, A*, ALT, astar_epsilon).
+
+        Args:
+            pairs: Iterable of (origin, destination) tuples
+
+        Returns:
+            list: (path, cost) per pair in input order; unknown nodes and
+                  unreachable destinations give ([], inf)
+        """
+        pairs = list(pairs)
+        by_origin = {}
+        for origin, destination in pairs:
+            if origin in self.graph and destination in self.graph:
+                by_origin.setdefault(origin, set()).add(destination)
+
+        paths = {}
+        for origin, destinations in by_origin.items():
+            if len(destinations) == 1:
+                destination = next(iter(destinations))
+                paths[(origin, destination)] = self.find_path(origin, destination)
+                continue
+            for destination, result in self.find_paths_from(origin, destinations).items():
+                paths[(origin, destination)] = result
+
+        return [paths.get(pair, ([], float('inf'))) for pair in map(tuple, pairs)]
+
+    def find_paths_from_depots(self, targets):
+        """
+        Find every target's path from its nearest reachable warehouse.
+
+        With the compiled graph one multi-source Dijkstra tree grown from all
+        warehouses labels every node with its nearest depot, so extra depots
+        add no per-target cost. With nearest_depot off, every route starts
+        at the first warehouse.
+
+        Args:
+            targets: Iterable of target nodes
+
+        Returns:
+            dict: {target: (depot, path, cost)}; unreachable targets get
+                  (None, [], inf)
+        """
+        targets = list(targets)
+        depots = self.warehouses()
+        if not self.nearest_depot:
+            depots = depots[:1]
+        if not depots:
+            return {target: (None, [], float('inf')) for target in targets}
+
+        if len(depots) == 1 or not self.use_compiled_graph:
+            results = {target: (None, [], float('inf')) for target in targets}
+            for depot in depots:
+                for target, (path, cost) in self.find_paths_from(depot, targets).items():
+                    if path and cost < results[target][2]:
+                        results[target] = (depot, path, cost)
+            return results
+
+        depots = tuple(depots)
+        results = {}
+        missing = []
+        for target in targets:
+            cached = self.route_cache.get(self._route_key("nearest-depot", depots, target))
+            if cached is not None:
+                results[target] = cached
+            else:
+                missing.append(target)
+
+        if missing:
+            csr = self.compiled_graph()
+            tree = self.shortest_path_tree(depots)
+            for target in missing:
+                node = csr.index.get(target)
+                path = tree.path(node) if node is not None else []
+                if path:
+                    result = (csr.nodes[path[0]], csr.path_names(path), tree.dist[node])
+                else:
+                    result = (None, [], float('inf'))
+                self.route_cache.put(self._route_key("nearest-depot", depots, target), result)
+                results[target] = result
+        return results
+
+    def depot_labels(self):
+        """
+        Label every node with its nearest reachable warehouse.
+
+        Returns:
+            dict: {node: (warehouse, distance)}, with (None, inf) for nodes
+                  no warehouse can reach
+        """
+        depots = tuple(self.warehouses())
+        if not depots:
+            return {node: (None, float('inf')) for node in self.graph.nodes()}
+        csr = self.compiled_graph()
+        tree = self.shortest_path_tree(depots)
+        origins = tree_origins(tree.dist, tree.parent)
+        return {node: (csr.nodes[origins[i]] if origins[i] != -1 else None, tree.dist[i])
+                for i, node in enumerate(csr.nodes)}
+
+    def _paths_from_tree(self, source, targets):
+        csr = self.compiled_graph()
+        if source not in csr.index:
+            return {target: ([], float('inf')) for target in targets}
+
+        if source in self._spt or self.graph.nodes[source].get('type') == "warehouse":
+            tree = self.shortest_path_tree(source)
+            dist, parent = tree.dist, tree.parent
+        else:
+            # Ad-hoc origins (e.g. batch queries) get a one-off tree: keeping one per
+            # origin ever queried grows without bound, and every road change repairs them all.
+            # Used once, it only grows until every target is settled
+            ids = {csr.index[target] for target in targets if target in csr.index}
+            dist, parent = grow_shortest_path_tree(csr, csr.index[source], ids, self.closures)
+
+        results = {}
+        for target in targets:
+            node = csr.index.get(target)
+            if node is None or dist[node] == float('inf'):
+                results[target] = ([], float('inf'))
+            else:
+                results[target] = (csr.path_names(tree_path(parent, node)), dist[node])
+        return results
 
     def plot_annotated_graph(self, save=False):
         plt.figure(figsize=(12, 8))
@@ -330,6 +1092,8 @@ class DisasterReliefSystem:
             self.graph.add_node(name, type=node_type)
             self.pos[name] = (x, y)
             self.node_types[name] = node_type
+            self.spatial.insert(name, x, y)
+            self._invalidate_graph()
             
             # Initialize empty supply demand for non-warehouse nodes
             if node_type != "warehouse":
@@ -361,6 +1125,8 @@ class DisasterReliefSystem:
         self.graph.remove_node(name)
         del self.pos[name]
         del self.node_types[name]
+        self.spatial.remove(name)
+        self._invalidate_graph()
         
         if name in self.supply_demand:
             del self.supply_demand[name]
@@ -583,6 +1349,8 @@ class DisasterReliefSystem:
             
         try:
             self.graph.add_edge(from_node, to_node, weight=weight, blocked=False)
+            self.blocked_roads.discard(tuple(sorted([from_node, to_node])))
+            self._invalidate_graph()
             print(f"Successfully added edge between {from_node} and {to_node}")
             
             # Recalculate routes and get image filename
@@ -599,7 +1367,7 @@ class DisasterReliefSystem:
         Args:
             warehouse_name: Name of the warehouse
             new_supplies: List of dictionaries with supply details
-                         [{"name": "supply_name", "weight": weight, "value": value, "category": "food/non-food", "food_type": "solid/liquid"}]
+                         [{"name": "supply_name", "weight": weight, "value": value, "category": "food/non-food", "food_type": "solid/liquid", "quantity": units in stock (optional), "volume": volume per unit (optional)}]
             
         Returns:
             dict: Status of the update including success and any warnings
@@ -622,6 +1390,8 @@ class DisasterReliefSystem:
             value = supply_data.get("value", 10.0)
             category = supply_data.get("category", "non-food")
             food_type = supply_data.get("food_type", None)
+            quantity = supply_data.get("quantity", None)  # None: unlimited stock
+            volume = supply_data.get("volume", None)  # None: volume not tracked
             
             if not supply_name:
                 continue
@@ -635,6 +1405,10 @@ class DisasterReliefSystem:
                 existing_supply["value"] = value
                 existing_supply["category"] = category
                 existing_supply["food_type"] = food_type
+                if quantity is not None:
+                    existing_supply["quantity"] = quantity
+                if volume is not None:
+                    existing_supply["volume"] = volume
                 print(f"Updated existing supply: {supply_name}")
             else:
                 # Add new supply
@@ -645,6 +1419,10 @@ class DisasterReliefSystem:
                     "category": category,
                     "food_type": food_type
                 }
+                if quantity is not None:
+                    new_supply["quantity"] = quantity
+                if volume is not None:
+                    new_supply["volume"] = volume
                 self.supplies.append(new_supply)
                 print(f"Added new supply to system: {supply_name}")
         
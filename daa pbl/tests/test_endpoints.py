@@ -0,0 +1,99 @@
+import copy
+import importlib
+
+import pytest
+
+from core.system import DisasterReliefSystem
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # app creates its logs folder relative to the working directory on import
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("app")
+
+
+@pytest.fixture
+def client(app_module):
+    demo = copy.deepcopy(app_module.SMALL_DEMO)
+    app_module.current_system = DisasterReliefSystem(demo["supplies"], demo["vehicles"], demo["nodes"],
+                                                     demo["edges"], demo["demands"])
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize("body", [
+    None,
+    {"from": ["Central Warehouse"], "to": "Hospital A"},
+    {"from": "Central Warehouse", "to": 7},
+    {"from": {"name": "Central Warehouse"}, "to": "Hospital A"},
+])
+def test_alternative_routes_rejects_bad_nodes(client, body):
+    response = client.post("/alternative_routes", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_alternative_routes_answers_valid_request(client):
+    response = client.post("/alternative_routes", json={"from": "Central Warehouse", "to": "Hospital A"})
+    assert response.status_code == 200
+    assert response.get_json()["routes"]
+
+
+@pytest.mark.parametrize("endpoint", ["/nearest_nodes", "/nodes_in_region"])
+@pytest.mark.parametrize("body", [None, [1, 2], "x"])
+def test_spatial_queries_reject_missing_or_non_object_body(client, endpoint, body):
+    response = client.post(endpoint, json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_spatial_queries_answer_valid_requests(client):
+    response = client.post("/nearest_nodes", json={"x": 0, "y": 0, "k": 2})
+    assert response.status_code == 200
+    assert len(response.get_json()["nodes"]) == 2
+
+    response = client.post("/nodes_in_region", json={"x": 0, "y": 0, "radius": 1000})
+    assert response.status_code == 200
+    assert response.get_json()["nodes"]
+
+
+@pytest.mark.parametrize("body", [
+    None,
+    [["Central Warehouse", "Hospital A"]],
+    {"pairs": "Central Warehouse"},
+    {"pairs": [["Central Warehouse"]]},
+    {"pairs": [{"from": "Central Warehouse", "to": 3}]},
+])
+def test_batch_routes_rejects_bad_pairs(client, body):
+    response = client.post("/api/routes/batch", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_batch_routes_answers_valid_request(client):
+    pairs = [["Central Warehouse", "Hospital A"], {"from": "Hospital A", "to": "Central Warehouse"}]
+    response = client.post("/api/routes/batch", json={"pairs": pairs})
+    assert response.status_code == 200
+    routes = response.get_json()["routes"]
+    assert [(route["from"], route["to"]) for route in routes] == [("Central Warehouse", "Hospital A"),
+                                                                  ("Hospital A", "Central Warehouse")]
+    assert all(route["path"] and route["cost"] is not None for route in routes)
+
+
+def test_distance_matrix_matches_point_to_point_routes(app_module, client):
+    system = app_module.current_system
+    system.block_road("Central Warehouse", "Hospital A")
+
+    response = client.get("/api/distance_matrix")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["nodes"] == system.interesting_nodes()
+    for origin, row in zip(data["nodes"], data["distances"]):
+        for destination, cost in zip(data["nodes"], row):
+            expected = system.find_path(origin, destination)[1]
+            assert cost == (None if expected == float("inf") else pytest.approx(expected))
+
+
+def test_distance_matrix_requires_simulation(app_module, client):
+    app_module.current_system = None
+    assert client.get("/api/distance_matrix").status_code == 400
@@ -0,0 +1,258 @@
+import itertools
+import random
+import time
+
+import pytest
+
+from core.knapsack import (DP_MAX_CELLS, MEET_IN_MIDDLE_MAX_ITEMS, approximate_knapsack, bounded_knapsack,
+                           choose_solver, integer_weights, knapsack, knapsack_2d, knapsack_fingerprint,
+                           knapsack_mode, solve_multi_knapsack)
+from core.system import DisasterReliefSystem
+
+
+def random_items(rng, n, max_weight=12, max_value=30):
+    return [{"name": f"item{i}", "value": rng.randint(0, max_value), "weight": rng.randint(0, max_weight)}
+            for i in range(n)]
+
+
+def brute_force(items, capacity, volume_capacity=None):
+    """Best total value over every subset of items, by enumeration."""
+    best = 0
+    for size in range(len(items) + 1):
+        for subset in itertools.combinations(items, size):
+            if sum(item["weight"] for item in subset) > capacity:
+                continue
+            if volume_capacity is not None and sum(item.get("volume", 0) for item in subset) > volume_capacity:
+                continue
+            best = max(best, sum(item["value"] for item in subset))
+    return best
+
+
+def check_selection(items, capacity, value, selected, volume_capacity=None):
+    assert len(set(selected)) == len(selected)
+    assert sum(items[i]["weight"] for i in selected) <= capacity + 1e-9
+    if volume_capacity is not None:
+        assert sum(items[i].get("volume", 0) for i in selected) <= volume_capacity + 1e-9
+    assert sum(items[i]["value"] for i in selected) == pytest.approx(value)
+
+
+def instances(seed, count=150, max_items=10):
+    rng = random.Random(seed)
+    for _ in range(count):
+        items = random_items(rng, rng.randint(0, max_items))
+        yield items, rng.randint(0, 40)
+
+
+@pytest.mark.parametrize("mode", ["dense", "auto"])
+def test_dp_matches_brute_force(mode):
+    for items, capacity in instances(16):
+        value, selected = knapsack(items, capacity, mode, solver="dp")
+        assert value == pytest.approx(brute_force(items, capacity))
+        check_selection(items, capacity, value, selected)
+
+
+@pytest.mark.parametrize("mode, memory_budget", [("packed", 1024), ("divide", 1), ("divide", 16), ("divide", 64)])
+def test_memory_bounded_modes_match_brute_force(mode, memory_budget):
+    for items, capacity in instances(17):
+        value, selected = knapsack(items, capacity, mode, memory_budget, solver="dp")
+        assert value == pytest.approx(brute_force(items, capacity))
+        check_selection(items, capacity, value, selected)
+
+
+def test_knapsack_mode_follows_memory_budget():
+    assert knapsack_mode(10, 99, memory_budget=11 * 100) == "dense"
+    assert knapsack_mode(10, 99, memory_budget=11 * 13) == "packed"
+    assert knapsack_mode(10, 99, memory_budget=100) == "divide"
+
+
+def test_integer_weights_divides_by_the_weights_gcd():
+    items = [{"weight": 2}, {"weight": 4}, {"weight": 6}]
+    assert integer_weights(items, 7) == ([1, 2, 3], 3)
+    assert integer_weights(items, [5, 9]) == ([1, 2, 3], [2, 4])
+    # Weights round up and capacities down to whole multiples of the resolution
+    assert integer_weights([{"weight": 1.5}, {"weight": 0.4}], 2.3, resolution=0.5) == ([3, 1], 4)
+
+
+def test_fractional_weights_with_resolution_match_brute_force():
+    rng = random.Random(18)
+    for _ in range(150):
+        items = [{"name": f"item{i}", "value": rng.randint(0, 30), "weight": rng.randint(0, 40) * 0.25}
+                 for i in range(rng.randint(0, 9))]
+        capacity = rng.randint(0, 60) * 0.25
+        value, selected = knapsack(items, capacity, resolution=0.25)
+        assert value == pytest.approx(brute_force(items, capacity))
+        check_selection(items, capacity, value, selected)
+
+
+def test_bounded_knapsack_matches_enumerating_counts():
+    rng = random.Random(19)
+    for _ in range(100):
+        items = random_items(rng, rng.randint(0, 4))
+        for item in items:
+            item["quantity"] = rng.randint(0, 5)
+        capacity = rng.randint(0, 50)
+        best = max(sum(count * item["value"] for count, item in zip(counts, items))
+                   for counts in itertools.product(*(range(item["quantity"] + 1) for item in items))
+                   if sum(count * item["weight"] for count, item in zip(counts, items)) <= capacity)
+
+        value, counts = bounded_knapsack(items, capacity)
+        assert value == pytest.approx(best)
+        assert all(0 <= count <= item["quantity"] for count, item in zip(counts, items))
+        assert sum(count * item["weight"] for count, item in zip(counts, items)) <= capacity
+        assert sum(count * item["value"] for count, item in zip(counts, items)) == pytest.approx(value)
+
+
+@pytest.mark.parametrize("solver", ["branch_and_bound", "meet_in_middle", "auto"])
+def test_exact_solvers_match_brute_force(solver):
+    for items, capacity in instances(20):
+        stats = {}
+        value, selected = knapsack(items, capacity, solver=solver, stats=stats)
+        assert value == pytest.approx(brute_force(items, capacity))
+        assert stats["guarantee"] == 1.0
+        check_selection(items, capacity, value, selected)
+
+
+def test_search_solvers_handle_large_capacities():
+    rng = random.Random(21)
+    for _ in range(20):
+        items = [{"name": f"item{i}", "value": rng.randint(1, 100), "weight": rng.randint(1, 10 ** 9)}
+                 for i in range(rng.randint(1, 10))]
+        capacity = rng.randint(10 ** 9, 3 * 10 ** 9)
+        best = brute_force(items, capacity)
+        for solver in ("branch_and_bound", "meet_in_middle", "auto"):
+            value, selected = knapsack(items, capacity, solver=solver)
+            assert value == pytest.approx(best)
+            check_selection(items, capacity, value, selected)
+
+
+def test_choose_solver_by_table_size_and_item_count():
+    assert choose_solver(10, DP_MAX_CELLS // 10 - 1) == "dp"
+    assert choose_solver(MEET_IN_MIDDLE_MAX_ITEMS, DP_MAX_CELLS) == "meet_in_middle"
+    assert choose_solver(MEET_IN_MIDDLE_MAX_ITEMS + 1, DP_MAX_CELLS) == "branch_and_bound"
+
+
+def fleet_optimum(items, capacities):
+    """Best total value over every assignment of items to vehicles (or to none)."""
+    best = 0
+    for owners in itertools.product(range(len(capacities) + 1), repeat=len(items)):
+        loads = [0] * len(capacities)
+        for item, owner in zip(items, owners):
+            if owner < len(capacities):
+                loads[owner] += item["weight"]
+        if all(load <= capacity for load, capacity in zip(loads, capacities)):
+            best = max(best, sum(item["value"] for item, owner in zip(items, owners) if owner < len(capacities)))
+    return best
+
+
+def test_multi_knapsack_is_feasible_and_bounded():
+    rng = random.Random(21)
+    for _ in range(60):
+        items = random_items(rng, rng.randint(0, 6))
+        vehicles = [{"id": f"V{k}", "capacity": rng.randint(0, 20)} for k in range(rng.randint(1, 3))]
+        result = solve_multi_knapsack(items, vehicles)
+
+        capacities = {vehicle["id"]: vehicle["capacity"] for vehicle in vehicles}
+        assigned = [i for _, indices in result["assignments"] for i in indices]
+        assert len(assigned) == len(set(assigned))
+        for vehicle_id, indices in result["assignments"]:
+            assert sum(items[i]["weight"] for i in indices) <= capacities[vehicle_id]
+        assert sum(items[i]["value"] for i in assigned) == pytest.approx(result["value"])
+
+        best = fleet_optimum(items, [vehicle["capacity"] for vehicle in vehicles])
+        assert result["value"] <= best + 1e-9 <= result["upper_bound"] + 2e-9
+        assert 0.0 <= result["gap"] <= 1.0
+
+
+def test_multi_knapsack_respects_the_time_budget():
+    # Strongly correlated values make branch and bound work hard on every vehicle
+    rng = random.Random(22)
+    items = []
+    for i in range(300):
+        weight = rng.randint(10 ** 5, 10 ** 6)
+        items.append({"name": f"item{i}", "value": weight + 10 ** 5, "weight": weight})
+    vehicles = [{"id": k, "capacity": rng.randint(5 * 10 ** 6, 10 ** 7)} for k in range(10)]
+    start = time.perf_counter()
+    result = solve_multi_knapsack(items, vehicles, time_budget=0.2)
+    assert time.perf_counter() - start < 1.0
+    assert result["value"] <= result["upper_bound"]
+
+
+@pytest.mark.parametrize("epsilon", [0.5, 0.2, 0.05])
+def test_fptas_is_within_its_guarantee(epsilon):
+    for items, capacity in instances(22, max_items=12):
+        value, selected, guarantee = approximate_knapsack(items, capacity, epsilon)
+        best = brute_force(items, capacity)
+        check_selection(items, capacity, value, selected)
+        assert 1 - epsilon <= guarantee <= 1.0
+        assert guarantee * best - 1e-9 <= value <= best + 1e-9
+
+
+@pytest.mark.parametrize("epsilon", [0, 1, -0.5, 2])
+def test_fptas_rejects_epsilon_outside_unit_interval(epsilon):
+    with pytest.raises(ValueError):
+        approximate_knapsack([{"name": "a", "value": 1, "weight": 1}], 1, epsilon)
+
+
+@pytest.mark.parametrize("epsilon", [0, 1, 1.5, -0.1])
+def test_system_rejects_knapsack_epsilon_outside_unit_interval(epsilon):
+    system = DisasterReliefSystem([], [], [], [], {})
+    with pytest.raises(ValueError):
+        system.knapsack_epsilon = epsilon
+    assert system.knapsack_epsilon is None
+
+
+def test_knapsack_fingerprint_identifies_equivalent_instances():
+    items = [{"name": "Water", "value": 10, "weight": 3.3, "quantity": 50},
+             {"name": "Medicine", "value": 15, "weight": 1}]
+    key = knapsack_fingerprint(items, 20, resolution=0.1)
+
+    # Item order, float noise and stock beyond what fits do not matter
+    same = [dict(items[1]), dict(items[0], weight=3.3000000001, quantity=7)]
+    assert knapsack_fingerprint(same, 20, resolution=0.1) == key
+    assert knapsack_fingerprint(items, 20.04, resolution=0.1) == key
+
+    assert knapsack_fingerprint(items, 21, resolution=0.1) != key
+    assert knapsack_fingerprint([dict(items[0], value=11), items[1]], 20, resolution=0.1) != key
+    assert knapsack_fingerprint([dict(items[0], quantity=2), items[1]], 20, resolution=0.1) != key
+
+
+def test_repeated_load_plans_come_from_the_cache():
+    supplies = [{"name": "Water", "value": 10, "weight": 3.3, "quantity": 50},
+                {"name": "Medicine", "value": 15, "weight": 1},
+                {"name": "Blankets", "value": 5, "weight": 4}]
+    system = DisasterReliefSystem(supplies, [], [], [], {})
+    first = system.plan_load(supplies, 20)
+    misses = system.knapsack_cache.misses
+    second = system.plan_load(list(reversed(supplies)), 20)
+    assert second == first
+    assert system.knapsack_cache.misses == misses
+    assert system.knapsack_cache.hits >= 1
+
+
+def volume_instances(seed, count=120, max_items=10):
+    rng = random.Random(seed)
+    for _ in range(count):
+        items = random_items(rng, rng.randint(0, max_items))
+        for item in items:
+            item["volume"] = rng.randint(0, 10)
+        yield items, rng.randint(0, 40), rng.randint(0, 30)
+
+
+@pytest.mark.parametrize("solver", ["pareto", "auto"])
+def test_two_dimensional_exact_solvers_match_brute_force(solver):
+    for items, capacity, volume_capacity in volume_instances(24):
+        stats = {}
+        value, selected = knapsack_2d(items, capacity, volume_capacity, solver=solver, stats=stats)
+        assert value == pytest.approx(brute_force(items, capacity, volume_capacity))
+        assert stats["guarantee"] == 1.0
+        check_selection(items, capacity, value, selected, volume_capacity)
+
+
+def test_lagrangian_is_feasible_and_within_its_guarantee():
+    for items, capacity, volume_capacity in volume_instances(25):
+        stats = {}
+        value, selected = knapsack_2d(items, capacity, volume_capacity, solver="lagrangian", stats=stats)
+        best = brute_force(items, capacity, volume_capacity)
+        check_selection(items, capacity, value, selected, volume_capacity)
+        assert 0.0 <= stats["guarantee"] <= 1.0
+        assert stats["guarantee"] * best - 1e-9 <= value <= best + 1e-9
@@ -0,0 +1,133 @@
+import copy
+import importlib
+import itertools
+
+import networkx as nx
+import pytest
+
+from core.system import DisasterReliefSystem
+
+FLAGS = [
+    {"use_ch": True},
+    {"bidirectional": True},
+    {"bidirectional": True, "use_astar": False},
+    {"astar_heuristic": "alt"},
+    {"astar_epsilon": 1.5},
+    {"use_compiled_graph": False, "astar_epsilon": 1.5},
+]
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # app creates its logs folder relative to the working directory on import
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("app")
+
+
+def make_system(app_module, flags):
+    demo = copy.deepcopy(app_module.LARGE_DEMO)
+    system = DisasterReliefSystem(demo["supplies"], demo["vehicles"], demo["nodes"],
+                                  demo["edges"], demo["demands"])
+    for name, value in flags.items():
+        setattr(system, name, value)
+    u, v = sorted(system.graph.edges())[0]
+    system.block_road(u, v)
+    return system
+
+
+def open_roads(system):
+    roads = nx.Graph([(u, v, data) for u, v, data in system.graph.edges(data=True)
+                      if not data.get('blocked')])
+    roads.add_nodes_from(system.graph.nodes())
+    return roads
+
+
+def check_route(system, roads, origin, destination, path, cost):
+    if not nx.has_path(roads, origin, destination):
+        assert not path and cost == float('inf')
+        return
+    optimal = nx.dijkstra_path_length(roads, origin, destination)
+    epsilon = max(1.0, system.astar_epsilon) if system.use_astar and not system.use_ch else 1.0
+    assert optimal - 1e-9 <= cost <= epsilon * optimal + 1e-9
+    assert path[0] == origin and path[-1] == destination
+    assert sum(roads[a][b]['weight'] for a, b in zip(path, path[1:])) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("flags", FLAGS)
+def test_batch_routes_single_destination_uses_flags(app_module, flags):
+    system = make_system(app_module, flags)
+    roads = open_roads(system)
+    nodes = sorted(roads.nodes())
+
+    # One destination per origin, so every query goes through find_path
+    for offset in range(1, len(nodes)):
+        batch = [(origin, nodes[(i + offset) % len(nodes)]) for i, origin in enumerate(nodes)]
+        for (origin, destination), (path, cost) in zip(batch, system.batch_routes(batch)):
+            check_route(system, roads, origin, destination, path, cost)
+
+    if system.use_ch:
+        assert system._ch is not None
+    if system.astar_heuristic == "alt":
+        assert system._landmarks is not None
+
+
+@pytest.mark.parametrize("flags", FLAGS)
+def test_route_endpoint_uses_flags(app_module, flags):
+    system = make_system(app_module, flags)
+    app_module.current_system = system
+    client = app_module.app.test_client()
+    roads = open_roads(system)
+
+    for origin, destination in itertools.permutations(sorted(roads.nodes()), 2):
+        response = client.post("/api/route", json={"from": origin, "to": destination})
+        assert response.status_code == 200
+        data = response.get_json()
+        check_route(system, roads, origin, destination, data["path"], data["cost"])
+
+
+def test_route_endpoint_rejects_bad_nodes(app_module):
+    app_module.current_system = make_system(app_module, {})
+    client = app_module.app.test_client()
+
+    assert client.post("/api/route", json={"from": ["A"], "to": "B"}).status_code == 400
+    assert client.post("/api/route", json={"from": "Nowhere", "to": "B"}).status_code == 400
+    assert client.post("/api/route", json=["A", "B"]).status_code == 400
+    assert client.post("/api/route", data="A,B").status_code == 400
+
+
+def test_contraction_hierarchy_survives_road_changes(app_module):
+    system = make_system(app_module, {"use_ch": True})
+    roads = open_roads(system)
+    # A route with a detour around its first road, so the closure must be searched around
+    origin, destination, road = next(
+        (u, v, tuple(path[:2]))
+        for u, v in itertools.permutations(sorted(roads.nodes()), 2)
+        for path in [system.find_path(u, v)[0]]
+        if len(path) > 1 and nx.has_path(nx.restricted_view(roads, [], [tuple(path[:2])]), u, v))
+    index = system.contraction_hierarchy()
+
+    system.block_road(*road)
+    path, cost = system.find_path(origin, destination)
+    assert system.contraction_hierarchy() is index
+    assert tuple(path[:2]) != road
+    check_route(system, open_roads(system), origin, destination, path, cost)
+
+    system.unblock_road(*road)
+    path, cost = system.find_path(origin, destination)
+    assert system.contraction_hierarchy() is index
+    check_route(system, open_roads(system), origin, destination, path, cost)
+
+
+def test_goal_heuristic_survives_road_changes(app_module):
+    system = make_system(app_module, {})
+    goal = sorted(system.graph.nodes())[-1]
+    table = system.goal_heuristic(goal)
+
+    u, v = sorted(system.graph.edges())[1]
+    system.block_road(u, v)
+    assert system.goal_heuristic(goal) is table
+    system.unblock_road(u, v)
+    assert system.goal_heuristic(goal) is table
+
+    system.add_new_node("Field Camp", "shelter", 0.0, 0.0)
+    assert system.goal_heuristic(goal) is not table